@@ -1,10 +1,11 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django.shortcuts import reverse
 from django.templatetags.static import static
 from django.utils.html import format_html
 from django.shortcuts import redirect
 from django.utils.http import url_has_allowed_host_and_scheme
-from .services import get_sorted_restaurants
+from .services import get_nearest_restaurants, set_menu_availability
 
 from .models import Product, ProductCategory, ProductCategory, Restaurant, RestaurantMenuItem, Order, OrderItem
 
@@ -55,6 +56,10 @@ class ProductAdmin(admin.ModelAdmin):
     inlines = [
         RestaurantMenuItemInline
     ]
+    actions = [
+        'make_unavailable',
+        'make_available',
+    ]
     fieldsets = (
         ('Общее', {
             'fields': [
@@ -100,6 +105,16 @@ class ProductAdmin(admin.ModelAdmin):
         return format_html('<a href="{edit_url}"><img src="{src}" style="max-height: 50px;"/></a>', edit_url=edit_url, src=obj.image.url)
     get_image_list_preview.short_description = 'превью'
 
+    @admin.action(description='Снять с продажи во всех ресторанах')
+    def make_unavailable(self, request, queryset):
+        changed = set_menu_availability(False, product_ids=queryset.values_list('id', flat=True))
+        self.message_user(request, f'Снято с продажи позиций меню: {changed}')
+
+    @admin.action(description='Вернуть в продажу во всех ресторанах')
+    def make_available(self, request, queryset):
+        changed = set_menu_availability(True, product_ids=queryset.values_list('id', flat=True))
+        self.message_user(request, f'Возвращено в продажу позиций меню: {changed}')
+
 
 @admin.register(ProductCategory)
 class ProductAdmin(admin.ModelAdmin):
@@ -112,6 +127,15 @@ class OrderItemInline(admin.TabularInline):
     fields = ('product', 'quantity', 'price')
 
 
+class OrderChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        orders = list(self.result_list)
+        nearest_restaurants = get_nearest_restaurants(orders)
+        for order in orders:
+            order.nearest_restaurant_with_distance = nearest_restaurants[order.id]
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display  = (
@@ -128,11 +152,16 @@ class OrderAdmin(admin.ModelAdmin):
     inlines = [OrderItemInline]
 
 
+    def get_changelist(self, request, **kwargs):
+        return OrderChangeList
+
+
     def nearest_restaurant(self, obj):
-        sorted_restaurants = get_sorted_restaurants(obj.address)
-        if not sorted_restaurants:
+        if not hasattr(obj, 'nearest_restaurant_with_distance'):
+            obj.nearest_restaurant_with_distance = get_nearest_restaurants([obj])[obj.id]
+        if not obj.nearest_restaurant_with_distance:
             return "Нет данных"
-        rest, dist = sorted_restaurants[0]
+        rest, dist = obj.nearest_restaurant_with_distance
         return f"{rest.name} — {dist} км"
 
 
@@ -0,0 +1,135 @@
+import uuid
+from collections import defaultdict
+
+from django.core.cache import cache
+
+
+VERSION_CACHE_KEY = 'foodcartapp:availability:version'
+SNAPSHOT_CACHE_TIMEOUT = 60 * 60 * 24
+RESTAURANT_FIELDS = ('id', 'name', 'address', 'contact_phone')
+
+
+class AvailabilityIndex:
+    def __init__(self, pairs=(), restaurants=()):
+        self.version = None
+        self.restaurants_by_product = defaultdict(set)
+        self.restaurants = {}
+        for product_id, restaurant_id in pairs:
+            self.add(product_id, restaurant_id)
+        for restaurant in restaurants:
+            self.set_restaurant(restaurant)
+
+    def add(self, product_id, restaurant_id):
+        self.restaurants_by_product[product_id].add(restaurant_id)
+
+    def set_restaurant(self, restaurant):
+        self.restaurants[restaurant['id']] = restaurant
+
+    def get_restaurant(self, restaurant_id):
+        from .models import Restaurant
+
+        values = self.restaurants.get(restaurant_id)
+        if values is None:
+            return None
+        return Restaurant(**values)
+
+    def restaurants_for(self, product_ids):
+        if not product_ids:
+            return set().union(*self.restaurants_by_product.values())
+
+        candidates = []
+        for product_id in product_ids:
+            restaurants = self.restaurants_by_product.get(product_id)
+            if not restaurants:
+                return set()
+            candidates.append(restaurants)
+
+        candidates.sort(key=len)
+        return candidates[0].intersection(*candidates[1:])
+
+
+_local_index = None
+
+
+def get_snapshot_cache_key(version):
+    return f'foodcartapp:availability:{version}'
+
+
+def build_availability_index():
+    from .models import Restaurant, RestaurantMenuItem
+
+    pairs = (
+        RestaurantMenuItem.objects
+        .filter(availability=True)
+        .values_list('product_id', 'restaurant_id')
+    )
+    restaurants = Restaurant.objects.values(*RESTAURANT_FIELDS)
+    return AvailabilityIndex(pairs, restaurants)
+
+
+def invalidate_availability_index():
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+
+def get_availability_index():
+    global _local_index
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(VERSION_CACHE_KEY, version, None)
+        version = cache.get(VERSION_CACHE_KEY, version)
+
+    index = _local_index
+    if index is not None and index.version == version:
+        return index
+
+    index = cache.get(get_snapshot_cache_key(version))
+    if index is None:
+        index = build_availability_index()
+        index.version = version
+        cache.add(get_snapshot_cache_key(version), index, SNAPSHOT_CACHE_TIMEOUT)
+
+    _local_index = index
+    return index
+
+
+def get_availability_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = get_availability_index().version
+    return version
+
+
+class AvailabilityMatrix:
+    def __init__(self, restaurant_ids, pairs=()):
+        self.restaurant_ids = list(restaurant_ids)
+        self.columns = {restaurant_id: number for number, restaurant_id in enumerate(self.restaurant_ids)}
+        self.rows = defaultdict(int)
+        for product_id, restaurant_id in pairs:
+            if restaurant_id in self.columns:
+                self.rows[product_id] |= 1 << self.columns[restaurant_id]
+
+    def row(self, product_id):
+        bitmap = self.rows.get(product_id, 0)
+        return [bool(bitmap >> number & 1) for number in range(len(self.restaurant_ids))]
+
+
+def build_availability_matrix():
+    from .models import Restaurant, RestaurantMenuItem
+
+    restaurant_ids = Restaurant.objects.order_by('name').values_list('id', flat=True)
+    pairs = (
+        RestaurantMenuItem.objects
+        .filter(availability=True)
+        .values_list('product_id', 'restaurant_id')
+    )
+    return AvailabilityMatrix(restaurant_ids, pairs)
+
+
+def get_availability_matrix():
+    cache_key = f'foodcartapp:availability:matrix:{get_availability_version()}'
+    matrix = cache.get(cache_key)
+    if matrix is None:
+        matrix = build_availability_matrix()
+        cache.set(cache_key, matrix, SNAPSHOT_CACHE_TIMEOUT)
+    return matrix
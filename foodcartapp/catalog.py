@@ -0,0 +1,142 @@
+import base64
+import binascii
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .streaming import iter_json_array
+
+
+VERSION_CACHE_KEY = 'foodcartapp:catalog:version'
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+CATALOG_ITERATOR_CHUNK_SIZE = 500
+CATALOG_FIELDS = (
+    'id', 'name', 'price', 'special_status',
+    'description', 'category', 'image', 'restaurant',
+)
+
+
+def dump_product(product, fields=CATALOG_FIELDS):
+    dumped_product = {
+        'id': product.id,
+        'name': product.name,
+        'price': product.price,
+        'special_status': product.special_status,
+        'category': {
+            'id': product.category.id,
+            'name': product.category.name,
+        } if product.category else None,
+        'image': product.image.url,
+        'restaurant': {
+            'id': product.id,
+            'name': product.name,
+        }
+    }
+    if 'description' in fields:
+        dumped_product['description'] = product.description
+    return {field: dumped_product[field] for field in fields}
+
+
+def get_catalog_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = bump_catalog_version()
+    return version
+
+
+def bump_catalog_version():
+    version = {
+        'etag': uuid.uuid4().hex,
+        'updated_at': timezone.now().replace(microsecond=0),
+    }
+    cache.set(VERSION_CACHE_KEY, version, None)
+    return version
+
+
+def get_catalog_cache_key():
+    return f'foodcartapp:catalog:{get_catalog_version()["etag"]}'
+
+
+def get_cached_catalog():
+    return cache.get(get_catalog_cache_key())
+
+
+def iter_rendered_catalog():
+    from .models import Product
+
+    cache_key = get_catalog_cache_key()
+    products = (
+        Product.objects
+        .select_related('category')
+        .available()
+        .iterator(chunk_size=CATALOG_ITERATOR_CHUNK_SIZE)
+    )
+
+    chunks = []
+    for chunk in iter_json_array(dump_product(product) for product in products):
+        chunks.append(chunk)
+        yield chunk
+    cache.set(cache_key, b''.join(chunks), CATALOG_CACHE_TIMEOUT)
+
+
+def encode_cursor(product_id):
+    return base64.urlsafe_b64encode(str(product_id).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError({'cursor': ['Некорректный курсор.']})
+
+
+def parse_positive_int(params, name, default):
+    value = params.get(name)
+    if value is None:
+        return default
+    if not (value.isascii() and value.isdigit()) or int(value) == 0:
+        raise ValidationError({name: ['Ожидалось целое положительное число.']})
+    return int(value)
+
+
+def get_catalog_page(params):
+    from .models import Product
+
+    products = Product.objects.select_related('category').available().order_by('id')
+
+    fields = CATALOG_FIELDS
+    if params.get('fields'):
+        fields = [field.strip() for field in params['fields'].split(',') if field.strip()]
+        unknown_fields = set(fields) - set(CATALOG_FIELDS)
+        if unknown_fields:
+            raise ValidationError({
+                'fields': [f'Неизвестные поля: {", ".join(sorted(unknown_fields))}.'],
+            })
+        if 'description' not in fields:
+            products = products.defer('description')
+
+    category_id = parse_positive_int(params, 'category', None)
+    if category_id:
+        products = products.filter(category_id=category_id)
+
+    special_status = params.get('special_status')
+    if special_status is not None:
+        if special_status not in ('true', 'false'):
+            raise ValidationError({'special_status': ['Ожидалось true или false.']})
+        products = products.filter(special_status=special_status == 'true')
+
+    if params.get('cursor'):
+        products = products.filter(id__gt=decode_cursor(params['cursor']))
+
+    limit = min(
+        parse_positive_int(params, 'limit', settings.CATALOG_PAGE_SIZE),
+        settings.CATALOG_MAX_PAGE_SIZE,
+    )
+    page = list(products[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1].id) if len(page) > limit else None
+
+    results = [dump_product(product, fields) for product in page[:limit]]
+    return results, next_cursor
@@ -0,0 +1,74 @@
+import uuid
+
+from django.core.cache import cache
+
+from geocoder.distances import distance_matrix
+from geocoder.services import fetch_coordinates
+from geocoder.spatial import SpatialIndex
+
+
+VERSION_CACHE_KEY = 'foodcartapp:locations:version'
+SNAPSHOT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class RestaurantLocations:
+    def __init__(self, points=()):
+        self.version = None
+        self.points = dict(points)
+        self.index = SpatialIndex(self.points.items())
+
+    def nearest(self, point, k=None, max_km=None, include=None):
+        found = [
+            restaurant_id
+            for restaurant_id, _ in self.index.nearest(point, k=k, max_km=max_km, include=include)
+        ]
+        if not found:
+            return []
+
+        [distances] = distance_matrix([point], [self.points[restaurant_id] for restaurant_id in found])
+        return sorted(zip(found, distances), key=lambda r: r[1])
+
+
+_local_locations = None
+
+
+def get_snapshot_cache_key(version):
+    return f'foodcartapp:locations:{version}'
+
+
+def build_restaurant_locations():
+    from .models import Restaurant
+
+    restaurants = list(Restaurant.objects.exclude(address='').values_list('id', 'address'))
+    coordinates = fetch_coordinates({address for _, address in restaurants})
+    return RestaurantLocations(
+        (restaurant_id, coordinates[address])
+        for restaurant_id, address in restaurants
+        if address in coordinates
+    )
+
+
+def invalidate_restaurant_locations():
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+
+
+def get_restaurant_locations():
+    global _local_locations
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(VERSION_CACHE_KEY, version, None)
+        version = cache.get(VERSION_CACHE_KEY, version)
+
+    locations = _local_locations
+    if locations is not None and locations.version == version:
+        return locations
+
+    locations = cache.get(get_snapshot_cache_key(version))
+    if locations is None:
+        locations = build_restaurant_locations()
+        locations.version = version
+        cache.add(get_snapshot_cache_key(version), locations, SNAPSHOT_CACHE_TIMEOUT)
+
+    _local_locations = locations
+    return locations
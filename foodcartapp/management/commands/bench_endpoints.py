@@ -0,0 +1,161 @@
+import json
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from foodcartapp.availability import invalidate_availability_index
+from foodcartapp.catalog import bump_catalog_version
+from foodcartapp.locations import invalidate_restaurant_locations
+from foodcartapp.synthetic import build_dataset
+from geocoder.services import coordinates_cache, get_geocoder
+
+
+ENDPOINTS = ['products_api', 'order_api', 'manager_orders', 'manager_products']
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными и замеряет задержку и пропускную способность '
+        'API и страниц менеджера. Результат выводится в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', type=int, default=20)
+        parser.add_argument('--products', type=int, default=100)
+        parser.add_argument('--orders', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=100, help='Запросов к каждому адресу')
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=ENDPOINTS)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для результатов, по умолчанию stdout')
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Не откатывать синтетические данные после замера',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('--requests должен быть не меньше 2: перцентили считаются минимум по двум замерам')
+
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING(
+                'DEBUG=True: отладочная панель и логирование SQL замедляют ответы, '
+                'для сравнения между релизами запускайте с DEBUG=False'
+            ))
+
+        dataset = {
+            'restaurants': options['restaurants'],
+            'products': options['products'],
+            'orders': options['orders'],
+        }
+        settings_override = override_settings(
+            GEOCODER_PROVIDER='geocoder.providers.FakeProvider',
+            ALLOWED_HOSTS=['testserver'],
+        )
+
+        with settings_override, transaction.atomic():
+            get_geocoder.cache_clear()
+            coordinates_cache.clear()
+            try:
+                started_at = time.perf_counter()
+                data = build_dataset(seed=options['seed'], **dataset)
+                seeded_in = time.perf_counter() - started_at
+
+                client = Client()
+                client.force_login(get_user_model().objects.create_user(
+                    username=f'bench-{timezone.now().timestamp()}',
+                    is_staff=True,
+                ))
+                rng = random.Random(options['seed'])
+                requests = {
+                    'products_api': lambda: client.get('/api/products/'),
+                    'order_api': lambda: self.register_order(client, rng, data['products']),
+                    'manager_orders': lambda: client.get('/manager/orders/'),
+                    'manager_products': lambda: client.get('/manager/products/'),
+                }
+
+                results = {
+                    endpoint: self.measure(requests[endpoint], options['requests'], options['warmup'])
+                    for endpoint in options['endpoints']
+                }
+            finally:
+                get_geocoder.cache_clear()
+                coordinates_cache.clear()
+            if not options['keep']:
+                transaction.set_rollback(True)
+        invalidate_availability_index()
+        invalidate_restaurant_locations()
+        bump_catalog_version()
+
+        report = json.dumps({
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'debug': settings.DEBUG,
+            'dataset': dataset,
+            'seed_seconds': round(seeded_in, 3),
+            'results': results,
+        }, ensure_ascii=False, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(report + '\n')
+            for endpoint, result in results.items():
+                self.stderr.write(
+                    f'{endpoint}: p50 {result["p50_ms"]} мс, p95 {result["p95_ms"]} мс, '
+                    f'p99 {result["p99_ms"]} мс, {result["rps"]} запросов/с, '
+                    f'{result["queries"]} SQL-запросов'
+                )
+        else:
+            self.stdout.write(report)
+
+    def register_order(self, client, rng, products):
+        payload = {
+            'products': [
+                {'product': product.id, 'quantity': rng.randint(1, 3)}
+                for product in rng.sample(products, min(3, len(products)))
+            ],
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79161234567',
+            'address': f'Москва, Синтетический проезд {rng.randrange(50)}',
+        }
+        return client.post('/api/order/', json.dumps(payload), content_type='application/json')
+
+    def send(self, request):
+        with TestCase.captureOnCommitCallbacks(execute=True):
+            response = request()
+            content = response.getvalue()
+        return response, content
+
+    def measure(self, request, repeat, warmup):
+        for _ in range(warmup):
+            self.send(request)
+
+        timings = []
+        with CaptureQueriesContext(connection) as context:
+            for _ in range(repeat):
+                started_at = time.perf_counter()
+                response, content = self.send(request)
+                timings.append(time.perf_counter() - started_at)
+                if response.status_code >= 400:
+                    raise CommandError(f'{response.status_code}: {content[:500]!r}')
+
+        percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+        return {
+            'requests': repeat,
+            'p50_ms': round(percentiles[49] * 1000, 2),
+            'p95_ms': round(percentiles[94] * 1000, 2),
+            'p99_ms': round(percentiles[98] * 1000, 2),
+            'mean_ms': round(statistics.fmean(timings) * 1000, 2),
+            'rps': round(repeat / sum(timings), 1),
+            'queries': round(len(context.captured_queries) / repeat, 1),
+        }
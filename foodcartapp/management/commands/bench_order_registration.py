@@ -0,0 +1,54 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from foodcartapp.models import Product
+from foodcartapp.views import register_order
+
+
+class Command(BaseCommand):
+    help = 'Замеряет число SQL-запросов и время регистрации заказа для корзин разного размера'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            products = Product.objects.bulk_create(
+                Product(name=f'Бенчмарк {number}', price=100 + number, image='bench.jpg')
+                for number in range(max(options['sizes']))
+            )
+            for size in options['sizes']:
+                queries, timings = self.measure(products[:size], options['repeat'])
+                self.stdout.write(
+                    f'{size:>4} позиций: {queries} запросов, '
+                    f'медиана {statistics.median(timings) * 1000:.1f} мс, '
+                    f'максимум {max(timings) * 1000:.1f} мс'
+                )
+            transaction.set_rollback(True)
+
+    def measure(self, products, repeat):
+        factory = APIRequestFactory()
+        payload = json.dumps({
+            'products': [{'product': product.id, 'quantity': 1} for product in products],
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79161234567',
+            'address': 'Москва, Тверская 1',
+        })
+
+        timings = []
+        for _ in range(repeat):
+            request = factory.post('/api/order/', payload, content_type='application/json')
+            with CaptureQueriesContext(connection) as context:
+                started_at = time.perf_counter()
+                response = register_order(request)
+                timings.append(time.perf_counter() - started_at)
+            assert response.status_code == 201, response.data
+        return len(context.captured_queries), timings
@@ -0,0 +1,88 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Order, Restaurant
+from geocoder.services import fetch_coordinates, get_or_create_coordinates_many
+
+
+ADDRESS_SOURCES = {
+    'restaurants': Restaurant,
+    'orders': Order,
+}
+
+
+class Command(BaseCommand):
+    help = 'Заранее геокодирует адреса ресторанов и заказов, которых ещё нет в кэше координат'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=100)
+        parser.add_argument(
+            '--checkpoint',
+            type=Path,
+            help='Файл с прогрессом: прерванный запуск продолжится с места остановки',
+        )
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        progress = {}
+        if checkpoint and checkpoint.exists():
+            progress = json.loads(checkpoint.read_text())
+
+        started_at = time.monotonic()
+        totals = {'processed': 0, 'skipped': 0, 'located': 0}
+        for source, model in ADDRESS_SOURCES.items():
+            addresses = (
+                model.objects
+                .exclude(address='')
+                .order_by('address')
+                .values_list('address', flat=True)
+                .distinct()
+            )
+            if source in progress:
+                addresses = addresses.filter(address__gt=progress[source])
+
+            chunks = self.iter_chunks(
+                addresses.iterator(chunk_size=options['chunk_size']),
+                options['chunk_size'],
+            )
+            for chunk in chunks:
+                known = fetch_coordinates(chunk)
+                missing = [address for address in chunk if address not in known]
+                located = get_or_create_coordinates_many(missing) if missing else {}
+
+                totals['processed'] += len(chunk)
+                totals['skipped'] += len(known)
+                totals['located'] += len(located)
+
+                progress[source] = chunk[-1]
+                if checkpoint:
+                    checkpoint.write_text(json.dumps(progress, ensure_ascii=False))
+
+                elapsed = time.monotonic() - started_at
+                self.stdout.write(
+                    f'{source}: адресов {totals["processed"]}, '
+                    f'уже в кэше {totals["skipped"]}, найдено {totals["located"]}, '
+                    f'{totals["processed"] / elapsed:.1f} адресов/с'
+                )
+
+        if checkpoint and checkpoint.exists():
+            checkpoint.unlink()
+        elapsed = time.monotonic() - started_at
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {elapsed:.1f} с: адресов {totals["processed"]}, '
+            f'уже в кэше {totals["skipped"]}, найдено {totals["located"]}, '
+            f'без координат {totals["processed"] - totals["skipped"] - totals["located"]}'
+        ))
+
+    def iter_chunks(self, addresses, chunk_size):
+        chunk = []
+        for address in addresses:
+            chunk.append(address)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from foodcartapp.models import Order
+from foodcartapp.services import refresh_order_candidates
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рестораны-кандидаты для заказов, которым ещё не назначен ресторан'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        orders = Order.objects.awaiting_restaurant()
+        refresh_order_candidates(orders, chunk_size=options['chunk_size'])
+        self.stdout.write(f'Обработано заказов: {orders.count()}')
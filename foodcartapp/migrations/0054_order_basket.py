@@ -0,0 +1,42 @@
+# Generated by Django 5.2.9 on 2026-10-18 20:19
+
+import hashlib
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def fill_baskets(apps, schema_editor):
+    Order = apps.get_model('foodcartapp', 'Order')
+    OrderItem = apps.get_model('foodcartapp', 'OrderItem')
+
+    product_ids = defaultdict(set)
+    for order_id, product_id in OrderItem.objects.values_list('order_id', 'product_id').iterator():
+        product_ids[order_id].add(product_id)
+
+    orders = list(Order.objects.only('id'))
+    for order in orders:
+        order.basket = ','.join(str(product_id) for product_id in sorted(product_ids[order.id]))
+        order.basket_hash = hashlib.sha1(order.basket.encode()).hexdigest()
+    Order.objects.bulk_update(orders, ['basket', 'basket_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0053_order_order_status_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='basket',
+            field=models.TextField(blank=True, editable=False, verbose_name='Состав корзины'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='basket_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=40, verbose_name='Хэш корзины'),
+        ),
+        migrations.RunPython(fill_baskets, migrations.RunPython.noop),
+    ]
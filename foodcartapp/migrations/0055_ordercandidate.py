@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-18 20:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0054_order_basket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distance_km', models.FloatField(verbose_name='расстояние, км')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidates', to='foodcartapp.order', verbose_name='заказ')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_candidates', to='foodcartapp.restaurant', verbose_name='ресторан')),
+            ],
+            options={
+                'verbose_name': 'ресторан-кандидат',
+                'verbose_name_plural': 'рестораны-кандидаты',
+                'ordering': ['distance_km'],
+                'unique_together': {('order', 'restaurant')},
+            },
+        ),
+    ]
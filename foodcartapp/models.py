@@ -1,10 +1,14 @@
 from django.db import models
-from django.db.models import F, Sum, DecimalField, ExpressionWrapper, Value
+from django.db.models import F, Sum, DecimalField, OuterRef, Subquery, Value
 from django.core.validators import MinValueValidator
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models.functions import Coalesce
 from phonenumber_field.modelfields import PhoneNumberField
+import hashlib
 from collections import defaultdict
+from decimal import Decimal
 
+from .availability import get_availability_index
 
 
 class Restaurant(models.Model):
@@ -102,11 +106,15 @@ class RestaurantMenuItemQuerySet(models.QuerySet):
         return self.filter(availability=True).select_related('restaurant', 'product')
 
     def restaurants_with_products(self):
-        
-        restaurants = defaultdict(set)
+        index = get_availability_index()
+        products = Product.objects.in_bulk(list(index.restaurants_by_product))
 
-        for item in self.available_menu():
-            restaurants[item.restaurant].add(item.product)
+        restaurants = defaultdict(set)
+        for product_id, restaurant_ids in index.restaurants_by_product.items():
+            for restaurant_id in restaurant_ids:
+                restaurant = index.get_restaurant(restaurant_id)
+                if restaurant and product_id in products:
+                    restaurants[restaurant].add(products[product_id])
 
         return restaurants
 
@@ -130,7 +138,8 @@ class RestaurantMenuItem(models.Model):
         db_index=True
     )
 
-    objects = RestaurantMenuItemQuerySet()
+    objects = RestaurantMenuItemQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'пункт меню ресторана'
         verbose_name_plural = 'пункты меню ресторана'
@@ -142,42 +151,61 @@ class RestaurantMenuItem(models.Model):
         return f"{self.restaurant.name} - {self.product.name}"
 
 
+def make_basket_fingerprint(product_ids):
+    basket = ','.join(str(product_id) for product_id in sorted(set(product_ids)))
+    return basket, hashlib.sha1(basket.encode()).hexdigest()
+
+
 class OrderQuerySet(models.QuerySet):
     def with_total_price(self):
+        total_price = (
+            OrderItem.objects
+            .filter(order=OuterRef('pk'))
+            .values('order')
+            .annotate(total=Sum(F('quantity') * F('price')))
+            .values('total')
+        )
         return self.annotate(
-            total_price=Sum(
-                ExpressionWrapper(
-                    F('items__quantity') * F('items__product__price'),
-                    output_field=DecimalField(max_digits=10, decimal_places=2),
-                )
+            total_price=Coalesce(
+                Subquery(total_price),
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
             )
         )
 
 
-    def with_available_restaurants(self):
-        menu_items = (
-            RestaurantMenuItem.objects
-            .filter(availability=True)
-            .select_related('restaurant', 'product')
-        )
+    def awaiting_restaurant(self):
+        return self.filter(restaurant__isnull=True).exclude(status=Order.Status.DELIVERED)
+
+    def refresh_baskets(self):
+        product_ids = defaultdict(set)
+        items = OrderItem.objects.filter(order__in=self).values_list('order_id', 'product_id')
+        for order_id, product_id in items:
+            product_ids[order_id].add(product_id)
+
+        orders = list(self.only('id'))
+        for order in orders:
+            order.set_basket(product_ids[order.id])
+        self.model.objects.bulk_update(orders, ['basket', 'basket_hash'])
 
-        restaurant_products = defaultdict(set)
-        for item in menu_items:
-            restaurant_products[item.restaurant].add(item.product)
+    def with_available_restaurants(self):
+        index = get_availability_index()
+        restaurants_by_basket = {}
 
         for order in self:
             if order.restaurant:
                 order.available_restaurants = [order.restaurant]
                 continue
 
-            order_products = {item.product for item in order.items.all()}
+            if order.basket_hash not in restaurants_by_basket:
+                available = [
+                    index.get_restaurant(restaurant_id)
+                    for restaurant_id in index.restaurants_for(order.get_basket_product_ids())
+                    if restaurant_id in index.restaurants
+                ]
+                restaurants_by_basket[order.basket_hash] = sorted(available, key=lambda r: r.name)
 
-            available = [
-                restaurant
-                for restaurant, products in restaurant_products.items()
-                if order_products.issubset(products)
-            ]
-            order.available_restaurants = sorted(available, key=lambda r: r.name)
+            order.available_restaurants = restaurants_by_basket[order.basket_hash]
 
         return self
 
@@ -225,15 +253,33 @@ class Order(models.Model):
         related_name='orders'
     )
 
+    basket = models.TextField('Состав корзины', blank=True, editable=False)
+    basket_hash = models.CharField(
+        'Хэш корзины',
+        max_length=40,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
+
     objects = OrderQuerySet.as_manager()
     class Meta:
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-id'], name='order_status_id_idx'),
+        ]
 
     def __str__(self):
         return f'{self.firstname} {self.lastname}'
 
+    def set_basket(self, product_ids):
+        self.basket, self.basket_hash = make_basket_fingerprint(product_ids)
+
+    def get_basket_product_ids(self):
+        return {int(product_id) for product_id in self.basket.split(',') if product_id}
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(
@@ -263,3 +309,50 @@ class OrderItem(models.Model):
         verbose_name = 'позиция заказа'
         verbose_name_plural = 'позиции заказа'
 
+
+
+class OrderCandidate(models.Model):
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='candidates',
+        verbose_name='заказ'
+    )
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name='order_candidates',
+        verbose_name='ресторан'
+    )
+    distance_km = models.FloatField('расстояние, км')
+
+    class Meta:
+        verbose_name = 'ресторан-кандидат'
+        verbose_name_plural = 'рестораны-кандидаты'
+        ordering = ['distance_km']
+        unique_together = [
+            ['order', 'restaurant']
+        ]
+
+
+class IdempotencyKey(models.Model):
+    key = models.CharField('ключ', max_length=255, unique=True)
+    request_hash = models.CharField('хэш запроса', max_length=64)
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='idempotency_keys',
+        verbose_name='заказ'
+    )
+    response_status = models.PositiveSmallIntegerField('код ответа')
+    response_body = models.JSONField('тело ответа', encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField('создан', auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'ключ идемпотентности'
+        verbose_name_plural = 'ключи идемпотентности'
+
+    def __str__(self):
+        return self.key
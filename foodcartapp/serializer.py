@@ -1,6 +1,7 @@
 import phonenumbers
 
-from geocoder.services import get_or_create_coordinates
+from geocoder.services import enqueue_geocoding
+from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import serializers
 from .models import Order, Product, OrderItem
 from django.db import transaction
@@ -15,11 +16,35 @@ class OrderItemsListSerializer(serializers.ListSerializer):
             raise serializers.ValidationError(f'Ожидался лист со значениями, но был получен "{t}"')
         if len(data) == 0:
             raise serializers.ValidationError('Этот список не может быть пустым.')
+        self.child.fields['product'].prefetch(
+            item.get('product') for item in data if isinstance(item, dict)
+        )
         return super().to_internal_value(data)
 
 
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    def prefetch(self, pks):
+        pks = {pk for pk in pks if isinstance(pk, int) and not isinstance(pk, bool)}
+        self.prefetched = self.get_queryset().in_bulk(pks)
+
+    def to_internal_value(self, data):
+        if isinstance(data, (bool, dict, list)):
+            self.fail('incorrect_type', input=data)
+
+        prefetched = getattr(self, 'prefetched', {})
+        if data in prefetched:
+            return prefetched[data]
+
+        try:
+            return self.get_queryset().get(pk=data)
+        except ObjectDoesNotExist:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', input=data)
+
+
 class OrderItemInputSerializer(serializers.Serializer):
-    product = serializers.PrimaryKeyRelatedField(
+    product = PrefetchedPrimaryKeyRelatedField(
         queryset=Product.objects.all(),
         error_messages={
             'does_not_exist': 'Недоступный первичный ключ "{pk_value}"',
@@ -84,16 +109,31 @@ class OrderCreateSerializer(serializers.Serializer):
         items = validated_data.pop('products')
 
         with transaction.atomic():
-            order = Order.objects.create(**validated_data)
+            order = Order(**validated_data)
+            order.set_basket(item['product'].id for item in items)
+            order.save()
 
-            if order.address:
-                get_or_create_coordinates(order.address)
-            for item in items:
-                product = item['product']
-                OrderItem.objects.create(
+            transaction.on_commit(lambda: enqueue_geocoding([order.address]))
+            OrderItem.objects.bulk_create(
+                OrderItem(
                     order=order,
-                    product=product,
+                    product=item['product'],
                     quantity=item['quantity'],
-                    price=product.price,
+                    price=item['product'].price,
                 )
+                for item in items
+            )
             return order
+
+
+class MenuAvailabilitySerializer(serializers.Serializer):
+    products = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+    )
+    restaurants = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        required=False,
+    )
+    availability = serializers.BooleanField()
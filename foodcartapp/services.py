@@ -1,49 +1,89 @@
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
-from geopy.distance import distance
-from geocoder.services import get_or_create_coordinates
+from django.conf import settings
+from django.db import transaction
 
+from .availability import get_availability_index, invalidate_availability_index
+from .catalog import bump_catalog_version
+from .locations import get_restaurant_locations
+from geocoder.services import fetch_coordinates
 
-geolocator = Nominatim(user_agent="starburger")
-geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1)
 
+def get_nearest_restaurants(orders):
+    availability_index = get_availability_index()
+    locations = get_restaurant_locations()
+    coordinates = fetch_coordinates({order.address for order in orders})
 
-def get_sorted_restaurants(order_address):
-    from .models import Restaurant
+    nearest = {}
+    for order in orders:
+        order_coords = coordinates.get(order.address)
+        found = locations.nearest(order_coords, k=1) if order_coords else None
+        restaurant = availability_index.get_restaurant(found[0][0]) if found else None
+        nearest[order.id] = (restaurant, found[0][1]) if restaurant else None
+    return nearest
 
-    order_coords = get_or_create_coordinates(order_address)
-    if not order_coords:
-        return None
 
-    results = []
+def refresh_order_candidates(orders, chunk_size=500):
+    from .models import Order, OrderCandidate
 
-    for restaurant in Restaurant.objects.exclude(latitude__isnull=True):
-        rest_coords = (restaurant.latitude, restaurant.longitude)
-        dist = distance(order_coords, rest_coords).km
-        results.append((restaurant, round(dist, 2)))
+    order_ids = list(orders.values_list('id', flat=True))
+    locations = get_restaurant_locations()
+    for start in range(0, len(order_ids), chunk_size):
+        chunk = order_ids[start:start + chunk_size]
+        active_orders = list(
+            Order.objects
+            .filter(id__in=chunk)
+            .awaiting_restaurant()
+            .with_available_restaurants()
+        )
+        coordinates = fetch_coordinates({order.address for order in active_orders})
 
-    return sorted(results, key=lambda r: r[1])
+        candidates = []
+        for order in active_orders:
+            if order.address not in coordinates:
+                continue
+            nearby_restaurants = locations.nearest(
+                coordinates[order.address],
+                max_km=settings.DELIVERY_RADIUS_KM,
+                include={r.id for r in order.available_restaurants},
+            )
+            candidates.extend(
+                OrderCandidate(order=order, restaurant_id=restaurant_id, distance_km=dist_km)
+                for restaurant_id, dist_km in nearby_restaurants
+            )
 
+        with transaction.atomic():
+            OrderCandidate.objects.filter(order_id__in=chunk).delete()
+            OrderCandidate.objects.bulk_create(candidates)
 
-def get_distance_km(point1, point2):
-    if not point1 or not point2:
-        return None
-    return round(distance(point1, point2).km, 2)
 
+def set_menu_availability(available, product_ids=None, restaurant_ids=None):
+    from .models import Order, RestaurantMenuItem
 
-def get_restaurants_with_distance(order_address, restaurants):
-    order_coords = get_or_create_coordinates(order_address)
-    if not order_coords:
-        return None
+    menu_items = RestaurantMenuItem.objects.exclude(availability=available)
+    if product_ids is not None:
+        menu_items = menu_items.filter(product_id__in=product_ids)
+    if restaurant_ids is not None:
+        menu_items = menu_items.filter(restaurant_id__in=restaurant_ids)
 
-    result = []
-    for restaurant in restaurants:
-        rest_coords = get_or_create_coordinates(restaurant.address)
-        if not rest_coords:
-            continue
+    with transaction.atomic():
+        changed_items = list(
+            menu_items
+            .select_for_update()
+            .values_list('id', 'product_id', 'restaurant_id')
+        )
+        if not changed_items:
+            return 0
+        RestaurantMenuItem.objects.filter(
+            id__in=[item_id for item_id, _, _ in changed_items],
+        ).update(availability=available)
 
-        dist_km = get_distance_km(order_coords, rest_coords)
-        result.append({'restaurant': restaurant, 'distance_km': dist_km})
+        def refresh():
+            invalidate_availability_index()
+            bump_catalog_version()
+            refresh_order_candidates(
+                Order.objects.awaiting_restaurant().filter(
+                    items__product_id__in={product_id for _, product_id, _ in changed_items},
+                ).distinct()
+            )
 
-    result.sort(key=lambda x: x['distance_km'] if x['distance_km'] is not None else 10**9)
-    return result
+        transaction.on_commit(refresh)
+    return len(changed_items)
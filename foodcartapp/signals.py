@@ -1,13 +1,124 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from foodcartapp.models import Restaurant
-from geocoder.services import get_or_create_coordinates
+from foodcartapp.availability import invalidate_availability_index
+from foodcartapp.catalog import bump_catalog_version
+from foodcartapp.locations import invalidate_restaurant_locations
+from foodcartapp.models import (
+    Order,
+    OrderItem,
+    Product,
+    ProductCategory,
+    Restaurant,
+    RestaurantMenuItem,
+)
+from foodcartapp.services import refresh_order_candidates
+from geocoder.models import Place
+from geocoder.services import enqueue_geocoding, normalize_address
+from geocoder.signals import places_updated
+
+
+@receiver(pre_save, sender=Restaurant)
+def track_restaurant_address(sender, instance, **kwargs):
+    old_address = None
+    if instance.pk is not None:
+        old_address = sender.objects.filter(pk=instance.pk).values_list('address', flat=True).first()
+    instance.address_changed = old_address != instance.address
 
 
 @receiver(post_save, sender=Restaurant)
 def fill_restaurant_coordinates(sender, instance, **kwargs):
-    if not instance.address:
+    if not getattr(instance, 'address_changed', True):
         return
 
-    get_or_create_coordinates(instance.address)
+    transaction.on_commit(invalidate_restaurant_locations)
+    if instance.address:
+        transaction.on_commit(lambda: enqueue_geocoding([instance.address]))
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+@receiver(post_delete, sender=Product)
+def invalidate_availability(sender, **kwargs):
+    transaction.on_commit(invalidate_availability_index)
+
+
+@receiver(post_delete, sender=Restaurant)
+@receiver(post_save, sender=Place)
+def invalidate_locations(sender, **kwargs):
+    transaction.on_commit(invalidate_restaurant_locations)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def invalidate_catalog(sender, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+class OrderRefresh:
+    def __init__(self, order_id, baskets):
+        self.order_id = order_id
+        self.baskets = baskets
+
+    def __call__(self):
+        orders = Order.objects.filter(pk=self.order_id)
+        if self.baskets:
+            orders.refresh_baskets()
+        refresh_order_candidates(orders)
+
+
+def schedule_order_refresh(order_id, baskets=False):
+    connection = transaction.get_connection()
+    for _, func, *_ in connection.run_on_commit:
+        if isinstance(func, OrderRefresh) and func.order_id == order_id:
+            func.baskets |= baskets
+            return
+    transaction.on_commit(OrderRefresh(order_id, baskets))
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def update_order_basket(sender, instance, **kwargs):
+    schedule_order_refresh(instance.order_id, baskets=True)
+
+
+@receiver(post_save, sender=Order)
+def update_order_candidates(sender, instance, **kwargs):
+    schedule_order_refresh(instance.pk)
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def update_candidates_for_menu_item(sender, instance, **kwargs):
+    transaction.on_commit(lambda: refresh_order_candidates(
+        Order.objects.awaiting_restaurant().filter(items__product_id=instance.product_id).distinct()
+    ))
+
+
+@receiver(post_save, sender=Place)
+def requeue_place(sender, instance, **kwargs):
+    transaction.on_commit(lambda: enqueue_geocoding([instance.address]))
+
+
+@receiver(places_updated)
+def update_candidates_for_addresses(sender, addresses, **kwargs):
+    normalized_addresses = {normalize_address(address) for address in addresses}
+    restaurant_addresses = Restaurant.objects.exclude(address='').values_list('address', flat=True)
+    if any(normalize_address(address) in normalized_addresses for address in restaurant_addresses):
+        transaction.on_commit(invalidate_restaurant_locations)
+        orders = Order.objects.awaiting_restaurant()
+    else:
+        orders = Order.objects.awaiting_restaurant()
+        orders = orders.filter(id__in=[
+            order_id
+            for order_id, address in orders.values_list('id', 'address')
+            if normalize_address(address) in normalized_addresses
+        ])
+    transaction.on_commit(lambda: refresh_order_candidates(orders))
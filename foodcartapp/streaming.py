@@ -0,0 +1,46 @@
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def get_encoder(compact=True):
+    return DjangoJSONEncoder(
+        ensure_ascii=False,
+        separators=(',', ':') if compact else (', ', ': '),
+    )
+
+
+def iter_chunks(parts, chunk_size=STREAM_CHUNK_SIZE):
+    buffer = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode()
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def iter_json_array(items, compact=True, chunk_size=STREAM_CHUNK_SIZE):
+    encode = get_encoder(compact).encode
+    separator = ',' if compact else ',\n'
+
+    def iter_parts():
+        yield '['
+        for number, item in enumerate(items):
+            if number:
+                yield separator
+            yield encode(item)
+        yield ']'
+
+    return iter_chunks(iter_parts(), chunk_size)
+
+
+def iter_ndjson(items, chunk_size=STREAM_CHUNK_SIZE):
+    encode = get_encoder().encode
+    return iter_chunks((encode(item) + '\n' for item in items), chunk_size)
+
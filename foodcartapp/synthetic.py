@@ -0,0 +1,100 @@
+import random
+from decimal import Decimal
+
+from geocoder.services import get_or_create_coordinates_many
+
+from .availability import invalidate_availability_index
+from .catalog import bump_catalog_version
+from .locations import invalidate_restaurant_locations
+from .models import (
+    Order,
+    OrderItem,
+    Product,
+    ProductCategory,
+    Restaurant,
+    RestaurantMenuItem,
+)
+from .services import refresh_order_candidates
+
+
+def build_dataset(
+    restaurants=5,
+    products=20,
+    orders=50,
+    items_per_order=3,
+    categories=3,
+    availability=0.8,
+    geocode=True,
+    seed=0,
+):
+    rng = random.Random(seed)
+
+    categories = ProductCategory.objects.bulk_create(
+        ProductCategory(name=f'Категория {number}')
+        for number in range(categories)
+    )
+    restaurants = Restaurant.objects.bulk_create(
+        Restaurant(
+            name=f'Ресторан {number}',
+            address=f'Москва, Синтетическая улица {number}',
+            contact_phone=f'+7916000{number:04d}',
+        )
+        for number in range(restaurants)
+    )
+    products = Product.objects.bulk_create(
+        Product(
+            name=f'Бургер {number}',
+            category=categories[number % len(categories)] if categories else None,
+            price=Decimal(100 + number),
+            image=f'synthetic/{number}.jpg',
+            special_status=number % 5 == 0,
+        )
+        for number in range(products)
+    )
+    RestaurantMenuItem.objects.bulk_create(
+        RestaurantMenuItem(
+            restaurant=restaurant,
+            product=product,
+            availability=rng.random() < availability,
+        )
+        for restaurant in restaurants
+        for product in products
+    )
+
+    order_baskets = []
+    for number in range(orders):
+        basket = rng.sample(products, min(items_per_order, len(products)))
+        order = Order(
+            firstname='Иван',
+            lastname=f'Синтетический {number}',
+            phonenumber='+79161234567',
+            address=f'Москва, Синтетический проезд {number % 50}',
+            payment_method=Order.PaymentMethod.CASH,
+        )
+        order.set_basket(product.id for product in basket)
+        order_baskets.append((order, basket))
+
+    orders = Order.objects.bulk_create(order for order, _ in order_baskets)
+    OrderItem.objects.bulk_create(
+        OrderItem(order=order, product=product, quantity=rng.randint(1, 3), price=product.price)
+        for order, basket in order_baskets
+        for product in basket
+    )
+
+    invalidate_availability_index()
+    bump_catalog_version()
+    if geocode:
+        get_or_create_coordinates_many(
+            {restaurant.address for restaurant in restaurants}
+            | {order.address for order in orders}
+        )
+    invalidate_restaurant_locations()
+    if geocode:
+        refresh_order_candidates(Order.objects.filter(id__in=[order.id for order in orders]))
+
+    return {
+        'categories': categories,
+        'restaurants': restaurants,
+        'products': products,
+        'orders': orders,
+    }
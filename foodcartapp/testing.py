@@ -0,0 +1,65 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from geocoder.services import coordinates_cache, get_geocoder
+
+from .synthetic import build_dataset
+
+
+class FakeGeocoderMixin:
+    def setUp(self):
+        super().setUp()
+        settings_override = override_settings(GEOCODER_PROVIDER='geocoder.providers.FakeProvider')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        cache.clear()
+        coordinates_cache.clear()
+        get_geocoder.cache_clear()
+        self.addCleanup(get_geocoder.cache_clear)
+
+    def login(self, **extra_fields):
+        user = get_user_model().objects.create_user(
+            username='manager',
+            password='password',
+            is_staff=True,
+            **extra_fields,
+        )
+        self.client.force_login(user)
+        return user
+
+
+class QueryBudgetMixin(FakeGeocoderMixin):
+    small_dataset = {'restaurants': 2, 'products': 5, 'orders': 5}
+    large_dataset = {'restaurants': 8, 'products': 40, 'orders': 60, 'seed': 1}
+    time_budget = 2.0
+
+    def measure(self, request):
+        with CaptureQueriesContext(connection) as context:
+            started_at = time.perf_counter()
+            response = request()
+            content = response.getvalue()
+            elapsed = time.perf_counter() - started_at
+        self.assertLess(response.status_code, 400, content[:500])
+        return len(context.captured_queries), elapsed, context.captured_queries
+
+    def assertQueryBudget(self, request, max_queries):
+        build_dataset(**self.small_dataset)
+        small_queries, _, _ = self.measure(request)
+
+        build_dataset(**self.large_dataset)
+        large_queries, elapsed, captured = self.measure(request)
+
+        self.assertEqual(
+            small_queries,
+            large_queries,
+            'Число запросов растёт вместе с объёмом данных:\n'
+            + '\n'.join(query['sql'] for query in captured),
+        )
+        self.assertLessEqual(large_queries, max_queries)
+        self.assertLess(elapsed, self.time_budget)
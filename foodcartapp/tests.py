@@ -0,0 +1,315 @@
+import json
+from datetime import timedelta
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from geocoder.distances import distance_matrix
+from geocoder.models import GeocodingJob, Place
+from geocoder.services import fetch_coordinates, normalize_address, process_geocoding_jobs
+
+from .availability import get_availability_index
+from .catalog import get_catalog_version
+from .models import (
+    IdempotencyKey,
+    Order,
+    OrderCandidate,
+    OrderItem,
+    Product,
+    Restaurant,
+    RestaurantMenuItem,
+)
+from .services import refresh_order_candidates
+from .signals import OrderRefresh
+from .synthetic import build_dataset
+from .testing import FakeGeocoderMixin, QueryBudgetMixin
+
+
+class ProductListApiTest(QueryBudgetMixin, TestCase):
+    def test_full_catalog(self):
+        self.assertQueryBudget(lambda: self.client.get('/api/products/'), max_queries=1)
+
+    def test_catalog_page(self):
+        self.assertQueryBudget(
+            lambda: self.client.get('/api/products/', {'limit': 100, 'fields': 'id,name,price'}),
+            max_queries=1,
+        )
+
+    def test_repeated_request_is_served_from_cache(self):
+        build_dataset(**self.small_dataset)
+        self.client.get('/api/products/').getvalue()
+
+        queries, _, _ = self.measure(lambda: self.client.get('/api/products/'))
+        self.assertEqual(queries, 0)
+
+    def test_server_timing_marks_streamed_catalog(self):
+        build_dataset(**self.small_dataset)
+
+        streamed = self.client.get('/api/products/')
+        streamed.getvalue()
+        self.assertIn('queries before streaming', streamed['Server-Timing'])
+
+        cached = self.client.get('/api/products/')
+        self.assertNotIn('before streaming', cached['Server-Timing'])
+
+    def test_catalog_version_changes_after_commit(self):
+        build_dataset(**self.small_dataset)
+        etag = get_catalog_version()['etag']
+        product = Product.objects.first()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.name = 'Новое название'
+            product.save()
+            self.assertEqual(get_catalog_version()['etag'], etag)
+
+        self.assertNotEqual(get_catalog_version()['etag'], etag)
+
+    def test_invalid_limit(self):
+        for limit in ['0', '-1', 'abc', '²', '١٢']:
+            with self.subTest(limit=limit):
+                response = self.client.get('/api/products/', {'limit': limit})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('limit', response.json())
+
+
+class RegisterOrderTest(QueryBudgetMixin, TestCase):
+    def register_order(self, products):
+        payload = {
+            'products': [{'product': product.id, 'quantity': 2} for product in products],
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79161234567',
+            'address': 'Москва, Тверская 1',
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/order/', json.dumps(payload), content_type='application/json')
+
+    def test_query_count_does_not_depend_on_basket_size(self):
+        build_dataset(**self.large_dataset)
+        products = list(Product.objects.order_by('id'))
+
+        small_queries, _, _ = self.measure(lambda: self.register_order(products[:1]))
+        large_queries, elapsed, captured = self.measure(lambda: self.register_order(products[:30]))
+
+        self.assertEqual(
+            small_queries,
+            large_queries,
+            '\n'.join(query['sql'] for query in captured),
+        )
+        self.assertLessEqual(large_queries, 15)
+        self.assertLess(elapsed, self.time_budget)
+
+
+class IdempotentOrderTest(FakeGeocoderMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        build_dataset(restaurants=2, products=3, orders=0)
+        self.payload = {
+            'products': [{'product': product.id, 'quantity': 1} for product in Product.objects.all()],
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79161234567',
+            'address': 'Москва, Тверская 1',
+        }
+
+    def post(self, payload, key='order-1'):
+        return self.client.post(
+            '/api/order/',
+            json.dumps(payload),
+            content_type='application/json',
+            headers={'Idempotency-Key': key},
+        )
+
+    def test_replay_returns_stored_response(self):
+        response = self.post(self.payload)
+        self.assertEqual(response.status_code, 201)
+
+        with self.assertNumQueries(1):
+            replayed = self.post(self.payload)
+
+        self.assertEqual(replayed.status_code, 201)
+        self.assertEqual(replayed.json(), response.json())
+        self.assertEqual(replayed['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_with_other_payload(self):
+        self.post(self.payload)
+        response = self.post({**self.payload, 'address': 'Москва, Арбат 1'})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_expired_key_creates_new_order(self):
+        self.post(self.payload)
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+        response = self.post(self.payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.get().order_id, response.json()['id'])
+
+    def test_invalid_order_does_not_store_key(self):
+        response = self.post({**self.payload, 'products': []})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class OrderAdminTest(QueryBudgetMixin, TestCase):
+    def test_changelist(self):
+        self.login(is_superuser=True)
+        self.assertQueryBudget(lambda: self.client.get('/admin/foodcartapp/order/'), max_queries=8)
+
+
+class MenuAvailabilityApiTest(QueryBudgetMixin, TestCase):
+    def toggle(self, products, availability):
+        payload = {'products': [product.id for product in products], 'availability': availability}
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/menu/availability/', json.dumps(payload), content_type='application/json')
+
+    def test_query_count_does_not_depend_on_menu_size(self):
+        self.login(is_superuser=True)
+        build_dataset(**self.large_dataset)
+        products = list(Product.objects.order_by('id'))
+
+        small_queries, _, _ = self.measure(lambda: self.toggle(products[:1], False))
+        large_queries, elapsed, captured = self.measure(lambda: self.toggle(products, False))
+
+        self.assertEqual(small_queries, large_queries, '\n'.join(query['sql'] for query in captured))
+        self.assertLess(elapsed, self.time_budget)
+        self.assertFalse(Product.objects.available().exists())
+
+    def test_returns_changed_rows(self):
+        self.login(is_superuser=True)
+        build_dataset(restaurants=3, products=2, orders=0, availability=1)
+
+        response = self.toggle(Product.objects.all(), False)
+        self.assertEqual(response.json(), {'changed': 6})
+
+        response = self.toggle(Product.objects.all(), False)
+        self.assertEqual(response.json(), {'changed': 0})
+
+    def test_requires_admin(self):
+        response = self.client.post('/api/menu/availability/', {}, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+
+class AvailabilityIndexTest(FakeGeocoderMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        build_dataset(restaurants=1, products=1, orders=0, availability=0)
+        self.product = Product.objects.get()
+        self.restaurant = Restaurant.objects.get()
+        self.assertEqual(get_availability_index().restaurants_for([self.product.id]), set())
+
+    def test_rolled_back_menu_item_is_not_published(self):
+        RestaurantMenuItem.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    RestaurantMenuItem.objects.create(restaurant=self.restaurant, product=self.product)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertFalse(RestaurantMenuItem.objects.exists())
+        self.assertEqual(get_availability_index().restaurants_for([self.product.id]), set())
+
+    def test_committed_change_is_published(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            RestaurantMenuItem.objects.update_or_create(
+                restaurant=self.restaurant,
+                product=self.product,
+                defaults={'availability': True},
+            )
+
+        self.assertEqual(get_availability_index().restaurants_for([self.product.id]), {self.restaurant.id})
+
+
+class OrderCandidatesTest(FakeGeocoderMixin, TestCase):
+    @override_settings(EXACT_DISTANCES=True)
+    def test_distances_come_from_distance_engine(self):
+        build_dataset(restaurants=3, products=2, orders=3, availability=1)
+        refresh_order_candidates(Order.objects.all())
+
+        candidates = OrderCandidate.objects.select_related('order', 'restaurant')
+        coordinates = fetch_coordinates(
+            {candidate.order.address for candidate in candidates}
+            | {candidate.restaurant.address for candidate in candidates}
+        )
+        self.assertEqual(len(candidates), 9)
+        for candidate in candidates:
+            [[expected_km]] = distance_matrix(
+                [coordinates[candidate.order.address]],
+                [coordinates[candidate.restaurant.address]],
+                exact=True,
+            )
+            self.assertEqual(candidate.distance_km, expected_km)
+
+    @override_settings(DELIVERY_RADIUS_KM=10)
+    def test_candidates_within_delivery_radius(self):
+        build_dataset(restaurants=3, products=2, orders=3, availability=1)
+        refresh_order_candidates(Order.objects.all())
+
+        distances = list(OrderCandidate.objects.values_list('distance_km', flat=True))
+        self.assertTrue(distances)
+        self.assertLess(len(distances), 9)
+        self.assertLessEqual(max(distances), 10)
+
+    def test_restaurant_locations_are_cached(self):
+        build_dataset(restaurants=3, products=2, orders=3, availability=1)
+        refresh_order_candidates(Order.objects.all())
+
+        with self.assertNumQueries(6):
+            refresh_order_candidates(Order.objects.all())
+
+    def test_order_is_refreshed_once_per_transaction(self):
+        build_dataset(restaurants=2, products=3, orders=1, availability=1)
+        order = Order.objects.get()
+        products = list(Product.objects.all())
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            order.comment = 'Позвонить заранее'
+            order.save()
+            OrderItem.objects.filter(order=order).delete()
+            for product in products:
+                OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+
+        refreshes = [callback for callback in callbacks if isinstance(callback, OrderRefresh)]
+        self.assertEqual(len(refreshes), 1)
+        self.assertTrue(refreshes[0].baskets)
+
+        refreshes[0]()
+        order.refresh_from_db()
+        self.assertEqual(order.get_basket_product_ids(), {product.id for product in products})
+        self.assertEqual(OrderCandidate.objects.filter(order=order).count(), 2)
+
+    def test_restaurant_rename_does_not_touch_candidates(self):
+        build_dataset(restaurants=2, products=2, orders=3, availability=1)
+        restaurant = Restaurant.objects.first()
+
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(2):
+            restaurant.name = 'Новое название'
+            restaurant.save()
+        self.assertFalse(GeocodingJob.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            restaurant.address = 'Москва, Новый адрес 1'
+            restaurant.save()
+        self.assertEqual(list(GeocodingJob.objects.values_list('address', flat=True)), [restaurant.address])
+
+    def test_place_edit_refreshes_orders_in_worker(self):
+        build_dataset(restaurants=2, products=2, orders=1, availability=1)
+        order = Order.objects.get()
+        OrderCandidate.objects.all().delete()
+
+        place = Place.objects.get(address=normalize_address(order.address))
+        with self.captureOnCommitCallbacks(execute=True):
+            place.latitude += 0.01
+            place.save()
+        self.assertFalse(OrderCandidate.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            process_geocoding_jobs()
+        self.assertEqual(OrderCandidate.objects.filter(order=order).count(), 2)
@@ -1,11 +1,34 @@
-from django.http import JsonResponse
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from django.templatetags.static import static
-from .models import Product
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from django.core.exceptions import ValidationError
+from .catalog import (
+    get_cached_catalog,
+    get_catalog_page,
+    get_catalog_version,
+    iter_rendered_catalog,
+)
 
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
-from .serializer import OrderCreateSerializer
+from .models import IdempotencyKey
+from .serializer import MenuAvailabilitySerializer, OrderCreateSerializer
+from .services import set_menu_availability
+
+
+CATALOG_QUERY_PARAMS = {'category', 'special_status', 'fields', 'limit', 'cursor'}
+
 
 def banners_list_api(request):
     # FIXME move data to db?
@@ -31,38 +54,122 @@ def banners_list_api(request):
     })
 
 
+def get_catalog_etag(request):
+    return get_catalog_version()['etag']
+
+
+def get_catalog_last_modified(request):
+    return get_catalog_version()['updated_at']
+
+
+@condition(etag_func=get_catalog_etag, last_modified_func=get_catalog_last_modified)
 def product_list_api(request):
-    products = Product.objects.select_related('category').available()
-
-    dumped_products = []
-    for product in products:
-        dumped_product = {
-            'id': product.id,
-            'name': product.name,
-            'price': product.price,
-            'special_status': product.special_status,
-            'description': product.description,
-            'category': {
-                'id': product.category.id,
-                'name': product.category.name,
-            } if product.category else None,
-            'image': product.image.url,
-            'restaurant': {
-                'id': product.id,
-                'name': product.name,
-            }
-        }
-        dumped_products.append(dumped_product)
-    return JsonResponse(dumped_products, safe=False, json_dumps_params={
+    if CATALOG_QUERY_PARAMS & request.GET.keys():
+        return paginated_product_list_api(request)
+
+    content = get_cached_catalog()
+    if content is None:
+        response = StreamingHttpResponse(iter_rendered_catalog(), content_type='application/json')
+    else:
+        response = HttpResponse(content, content_type='application/json')
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def paginated_product_list_api(request):
+    try:
+        products, next_cursor = get_catalog_page(request.GET)
+    except ValidationError as error:
+        return JsonResponse(error.message_dict, status=400, json_dumps_params={
+            'ensure_ascii': False,
+        })
+
+    next_url = None
+    if next_cursor:
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        next_url = f'{request.path}?{query.urlencode()}'
+
+    response = JsonResponse({'results': products, 'next': next_url}, json_dumps_params={
         'ensure_ascii': False,
-        'indent': 4,
     })
+    patch_cache_control(response, no_cache=True)
+    return response
 
-@api_view(['POST'])
-def register_order(request):
-    serializer = OrderCreateSerializer(data=request.data)
+
+def get_request_hash(data):
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    ).hexdigest()
+
+
+def replay_order_response(stored_key, request_hash):
+    if stored_key.request_hash != request_hash:
+        return Response(
+            {'detail': 'Этот ключ идемпотентности уже использован для другого заказа.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(
+        stored_key.response_body,
+        status=stored_key.response_status,
+        headers={'Idempotent-Replayed': 'true'},
+    )
+
+
+def create_order(data):
+    serializer = OrderCreateSerializer(data=data)
     serializer.is_valid(raise_exception=True)
     order = serializer.save()
 
     response_serializer = OrderCreateSerializer(order)
-    return Response(response_serializer.data, status=status.HTTP_201_CREATED)
\ No newline at end of file
+    return order, Response(response_serializer.data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+def register_order(request):
+    key = request.headers.get('Idempotency-Key')
+    if not key:
+        _, response = create_order(request.data)
+        return response
+
+    if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+        return Response(
+            {'Idempotency-Key': ['Ключ идемпотентности слишком длинный.']},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    request_hash = get_request_hash(request.data)
+    stored_keys = IdempotencyKey.objects.filter(key=key)
+    expires_after = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    stored_key = stored_keys.filter(created_at__gte=expires_after).first()
+    if stored_key:
+        return replay_order_response(stored_key, request_hash)
+
+    try:
+        with transaction.atomic():
+            stored_keys.delete()
+            order, response = create_order(request.data)
+            IdempotencyKey.objects.create(
+                key=key,
+                request_hash=request_hash,
+                order=order,
+                response_status=response.status_code,
+                response_body=response.data,
+            )
+    except IntegrityError:
+        return replay_order_response(stored_keys.get(), request_hash)
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def update_menu_availability(request):
+    serializer = MenuAvailabilitySerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    changed = set_menu_availability(
+        serializer.validated_data['availability'],
+        product_ids=serializer.validated_data['products'],
+        restaurant_ids=serializer.validated_data.get('restaurants'),
+    )
+    return Response({'changed': changed})
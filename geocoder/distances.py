@@ -0,0 +1,42 @@
+from math import asin, cos, radians, sin, sqrt
+
+from django.conf import settings
+from geopy.distance import distance
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_vector(point):
+    lat, lon = radians(point[0]), radians(point[1])
+    return (cos(lat) * cos(lon), cos(lat) * sin(lon), sin(lat))
+
+
+def haversine_matrix(origins, destinations):
+    destinations = [to_unit_vector(point) for point in destinations]
+    scale = 2 * EARTH_RADIUS_KM
+    return [
+        [
+            scale * asin(min(1.0, sqrt((x - dx) ** 2 + (y - dy) ** 2 + (z - dz) ** 2) / 2))
+            for dx, dy, dz in destinations
+        ]
+        for x, y, z in map(to_unit_vector, origins)
+    ]
+
+
+def geodesic_matrix(origins, destinations):
+    destinations = list(destinations)
+    return [
+        [distance(origin, destination).km for destination in destinations]
+        for origin in origins
+    ]
+
+
+def distance_matrix(origins, destinations, exact=None):
+    if exact is None:
+        exact = settings.EXACT_DISTANCES
+    if exact:
+        matrix = geodesic_matrix(origins, destinations)
+    else:
+        matrix = haversine_matrix(origins, destinations)
+    return [[round(km, 2) for km in row] for row in matrix]
@@ -0,0 +1,48 @@
+import gzip
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from geocoder.models import Place
+
+
+PLACE_FIELDS = ['address', 'latitude', 'longitude', 'retry_after']
+
+
+def open_places_file(path, mode):
+    if path == '-':
+        return sys.stdin if mode == 'r' else sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, f'{mode}t', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class Command(BaseCommand):
+    help = 'Выгружает кэш координат в файл NDJSON: первая строка — список полей, дальше по строке на адрес'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл для выгрузки, «-» — stdout. Файл с расширением .gz будет сжат')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        places = (
+            Place.objects
+            .order_by('id')
+            .values_list(*PLACE_FIELDS)
+            .iterator(chunk_size=options['chunk_size'])
+        )
+
+        dumped = 0
+        output = open_places_file(options['path'], 'w')
+        try:
+            output.write(json.dumps(PLACE_FIELDS) + '\n')
+            for address, lat, lon, retry_after in places:
+                row = [address, lat, lon, retry_after.isoformat() if retry_after else None]
+                output.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n')
+                dumped += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        self.stderr.write(f'Выгружено адресов: {dumped}')
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from geocoder.services import process_geocoding_jobs
+
+
+class Command(BaseCommand):
+    help = 'Геокодирует адреса из очереди GeocodingJob'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--poll-interval', type=float, default=5)
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать очередь и выйти, не дожидаясь новых задач',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_geocoding_jobs(options['batch_size'])
+            if processed:
+                self.stdout.write(f'Обработано адресов: {processed}')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,72 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from geocoder.models import Place
+from geocoder.services import normalize_address
+from geocoder.signals import places_updated
+
+from .dump_places import PLACE_FIELDS, open_places_file
+
+
+class Command(BaseCommand):
+    help = 'Загружает кэш координат из файла, выгруженного командой dump_places'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с выгрузкой, «-» — stdin')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--overwrite',
+            action='store_true',
+            help='Перезаписать координаты адресов, которые уже есть в базе',
+        )
+
+    def handle(self, *args, **options):
+        loaded = 0
+        located_addresses = []
+        places_file = open_places_file(options['path'], 'r')
+        try:
+            header = json.loads(next(places_file, 'null'))
+            if header != PLACE_FIELDS:
+                raise CommandError(f'Неизвестный формат файла, ожидались поля {PLACE_FIELDS}')
+
+            batch = {}
+            for line in places_file:
+                if not line.strip():
+                    continue
+                address, lat, lon, retry_after = json.loads(line)
+                address = normalize_address(address)
+                batch[address] = Place(
+                    address=address,
+                    latitude=lat,
+                    longitude=lon,
+                    retry_after=parse_datetime(retry_after) if retry_after else None,
+                )
+                if lat is not None and lon is not None:
+                    located_addresses.append(address)
+                if len(batch) >= options['batch_size']:
+                    loaded += self.save(batch.values(), options['overwrite'])
+                    batch = {}
+            loaded += self.save(batch.values(), options['overwrite'])
+        finally:
+            if places_file is not sys.stdin:
+                places_file.close()
+
+        if located_addresses:
+            places_updated.send(sender=Place, addresses=located_addresses)
+        self.stdout.write(f'Обработано адресов: {loaded}')
+
+    def save(self, places, overwrite):
+        places = list(places)
+        if overwrite:
+            Place.objects.bulk_create(
+                places,
+                update_conflicts=True,
+                unique_fields=['address'],
+                update_fields=['latitude', 'longitude', 'updated_at', 'retry_after'],
+            )
+        else:
+            Place.objects.bulk_create(places, ignore_conflicts=True)
+        return len(places)
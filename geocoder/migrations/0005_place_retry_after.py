@@ -0,0 +1,49 @@
+# Generated by Django 5.2.9 on 2026-10-18 20:22
+
+import re
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def normalize_address(address):
+    address = ' '.join(address.split())
+    address = re.sub(r'\s*,\s*', ', ', address)
+    return address.strip(' ,').lower()
+
+
+def normalize_places(apps, schema_editor):
+    Place = apps.get_model('geocoder', 'Place')
+
+    places_by_address = defaultdict(list)
+    for place in Place.objects.order_by('-updated_at').iterator():
+        places_by_address[normalize_address(place.address)].append(place)
+
+    duplicate_ids = []
+    renamed = []
+    for address, places in places_by_address.items():
+        places.sort(key=lambda place: place.latitude is None)
+        kept, *duplicates = places
+        duplicate_ids.extend(place.id for place in duplicates)
+        if kept.address != address:
+            kept.address = address
+            renamed.append(kept)
+
+    Place.objects.filter(id__in=duplicate_ids).delete()
+    Place.objects.bulk_update(renamed, ['address'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geocoder', '0004_geocodingjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='retry_after',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Повторить запрос после'),
+        ),
+        migrations.RunPython(normalize_places, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,34 @@ class Place(models.Model):
     latitude = models.FloatField(null=True, blank=True, verbose_name="Ширина")
     longitude = models.FloatField(null=True, blank=True, verbose_name="Долгота")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Последнее обновление")
-    
+    retry_after = models.DateTimeField(null=True, blank=True, verbose_name="Повторить запрос после")
+
+    def __str__(self):
+        return self.address
+
+
+class GeocodingJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Ожидает'
+        DONE = 'done', 'Выполнено'
+        FAILED = 'failed', 'Адрес не найден'
+
+    address = models.CharField(max_length=255, unique=True, verbose_name='Адрес')
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+        verbose_name='Статус',
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Попыток')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Последнее обновление')
+
+    class Meta:
+        verbose_name = 'задача геокодирования'
+        verbose_name_plural = 'задачи геокодирования'
+        ordering = ['id']
+
     def __str__(self):
-        return self.address
\ No newline at end of file
+        return self.address
@@ -0,0 +1,32 @@
+import hashlib
+
+from geopy.extra.rate_limiter import RateLimiter
+from geopy.geocoders import Nominatim
+
+
+class NominatimProvider:
+    def __init__(self, user_agent='starburger', min_delay_seconds=1):
+        geolocator = Nominatim(user_agent=user_agent)
+        self.geocode = RateLimiter(geolocator.geocode, min_delay_seconds=min_delay_seconds)
+
+    def __call__(self, address):
+        location = self.geocode(address)
+        if not location:
+            return None
+        return (location.latitude, location.longitude)
+
+
+class FakeProvider:
+    center = (55.751244, 37.618423)
+    spread = 0.25
+
+    def __call__(self, address):
+        if not address.strip():
+            return None
+        digest = hashlib.md5(address.encode()).digest()
+        lat_shift = int.from_bytes(digest[:4], 'big') / 2**32 - 0.5
+        lon_shift = int.from_bytes(digest[4:8], 'big') / 2**32 - 0.5
+        return (
+            round(self.center[0] + lat_shift * self.spread, 6),
+            round(self.center[1] + lon_shift * self.spread, 6),
+        )
@@ -1,24 +1,219 @@
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
-from .models import Place
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import GeocodingJob, Place
+from .signals import geocoding_finished, places_updated
+
+
+MISSING = object()
+
+
+class CoordinatesCache:
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, address):
+        with self.lock:
+            entry = self.entries.get(address)
+            if entry is None:
+                return MISSING
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[address]
+                return MISSING
+            self.entries.move_to_end(address)
+            return value
+
+    def set(self, address, value):
+        with self.lock:
+            self.entries[address] = (value, time.monotonic() + self.timeout)
+            self.entries.move_to_end(address)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+coordinates_cache = CoordinatesCache(
+    maxsize=settings.GEOCODER_LRU_SIZE,
+    timeout=settings.GEOCODER_LRU_TIMEOUT,
+)
+
+
+@lru_cache(maxsize=None)
+def get_geocoder():
+    return import_string(settings.GEOCODER_PROVIDER)()
+
+
+def normalize_address(address):
+    address = ' '.join(address.split())
+    address = re.sub(r'\s*,\s*', ', ', address)
+    return address.strip(' ,').lower()
+
+
+def get_refresh_at(updated_at, retry_after, has_coordinates):
+    if retry_after:
+        return retry_after
+    if has_coordinates:
+        return updated_at + timedelta(seconds=settings.GEOCODER_TTL)
+    return updated_at
+
+
+def lookup_places(normalized_addresses):
+    known = {}
+    unknown = []
+    for address in normalized_addresses:
+        cached = coordinates_cache.get(address)
+        if cached is MISSING:
+            unknown.append(address)
+        else:
+            known[address] = cached
+
+    places = (
+        Place.objects
+        .filter(address__in=unknown)
+        .values_list('address', 'latitude', 'longitude', 'updated_at', 'retry_after')
+    )
+    for address, lat, lon, updated_at, retry_after in places:
+        coords = (lat, lon) if lat is not None and lon is not None else None
+        known[address] = (coords, get_refresh_at(updated_at, retry_after, bool(coords)))
+        coordinates_cache.set(address, known[address])
+    return known
+
+
+def fetch_coordinates(addresses):
+    normalized = {address: normalize_address(address) for address in addresses if address}
+    known = lookup_places(set(normalized.values()))
+    return {
+        address: known[normalized_address][0]
+        for address, normalized_address in normalized.items()
+        if normalized_address in known and known[normalized_address][0]
+    }
+
+
+def get_or_create_coordinates_many(addresses):
+    normalized = {address: normalize_address(address) for address in addresses if address}
+    known = lookup_places(set(normalized.values()))
+
+    now = timezone.now()
+    missing = sorted(
+        address
+        for address in set(normalized.values())
+        if address and (address not in known or known[address][1] <= now)
+    )
+
+    located_addresses = set()
+    if missing:
+        geocode = get_geocoder()
+        max_workers = min(settings.GEOCODER_WORKERS, len(missing))
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            located = list(executor.map(geocode, missing))
+        geocoding_finished.send(
+            sender=Place,
+            calls=len(missing),
+            duration=time.perf_counter() - started_at,
+        )
+
+        retry_after = now + timedelta(seconds=settings.GEOCODER_RETRY_DELAY)
+        located_places = []
+        missed_places = []
+        for address, coords in zip(missing, located):
+            if not coords:
+                previous_coords = known.get(address, (None, None))[0]
+                known[address] = (previous_coords, retry_after)
+                missed_places.append(Place(address=address, retry_after=retry_after))
+                continue
+            known[address] = (coords, now + timedelta(seconds=settings.GEOCODER_TTL))
+            located_addresses.add(address)
+            located_places.append(Place(
+                address=address,
+                latitude=coords[0],
+                longitude=coords[1],
+                retry_after=None,
+            ))
+
+        Place.objects.bulk_create(
+            located_places,
+            update_conflicts=True,
+            unique_fields=['address'],
+            update_fields=['latitude', 'longitude', 'updated_at', 'retry_after'],
+        )
+        Place.objects.bulk_create(
+            missed_places,
+            update_conflicts=True,
+            unique_fields=['address'],
+            update_fields=['retry_after'],
+        )
+        for address in missing:
+            coordinates_cache.set(address, known[address])
+
+    if located_addresses:
+        places_updated.send(sender=Place, addresses=[
+            address
+            for address, normalized_address in normalized.items()
+            if normalized_address in located_addresses
+        ])
+
+    return {
+        address: known[normalized_address][0]
+        for address, normalized_address in normalized.items()
+        if normalized_address in known and known[normalized_address][0]
+    }
 
-geolocator = Nominatim(user_agent="starburger")
-geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1)
 
 def get_or_create_coordinates(address_text):
-    place, _ = Place.objects.get_or_create(address=address_text)
+    return get_or_create_coordinates_many([address_text]).get(address_text)
+
+
+def enqueue_geocoding(addresses):
+    jobs = [GeocodingJob(address=address) for address in set(addresses) if address]
+    GeocodingJob.objects.bulk_create(
+        jobs,
+        update_conflicts=True,
+        unique_fields=['address'],
+        update_fields=['status', 'updated_at'],
+    )
+
 
-    if place.latitude and place.longitude:
-        return (place.latitude, place.longitude)
+def get_pending_addresses(addresses):
+    return set(
+        GeocodingJob.objects
+        .filter(address__in=addresses, status=GeocodingJob.Status.PENDING)
+        .values_list('address', flat=True)
+    )
 
-    location = geocode(address_text)
-    if not location:
-        return None
-    
 
-    place.latitude = location.latitude
-    place.longitude = location.longitude
-    place.save()
+def process_geocoding_jobs(batch_size=50):
+    jobs = list(GeocodingJob.objects.filter(status=GeocodingJob.Status.PENDING)[:batch_size])
+    if not jobs:
+        return 0
 
-    return (location.latitude, location.longitude)
+    addresses = [job.address for job in jobs]
+    already_located = fetch_coordinates(addresses)
+    coordinates = get_or_create_coordinates_many(addresses)
+    for job in jobs:
+        job.attempts += 1
+        if job.address in coordinates:
+            job.status = GeocodingJob.Status.DONE
+        else:
+            job.status = GeocodingJob.Status.FAILED
 
+    GeocodingJob.objects.bulk_update(jobs, ['status', 'attempts', 'updated_at'])
+    if already_located:
+        places_updated.send(sender=Place, addresses=list(already_located))
+    return len(jobs)
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+
+places_updated = Signal()
+geocoding_finished = Signal()
@@ -0,0 +1,80 @@
+import heapq
+from math import asin, inf, pi, sin
+
+from .distances import EARTH_RADIUS_KM, to_unit_vector
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, chord / 2))
+
+
+def km_to_chord(km):
+    return 2 * sin(min(km / EARTH_RADIUS_KM, pi) / 2)
+
+
+class SpatialIndex:
+    def __init__(self, items):
+        nodes = [(to_unit_vector(point), key) for key, point in items]
+        self.size = len(nodes)
+        self.root = self.build(nodes, depth=0)
+
+    def build(self, nodes, depth):
+        if not nodes:
+            return None
+        axis = depth % 3
+        nodes.sort(key=lambda node: node[0][axis])
+        median = len(nodes) // 2
+        vector, key = nodes[median]
+        return (
+            vector,
+            key,
+            axis,
+            self.build(nodes[:median], depth + 1),
+            self.build(nodes[median + 1:], depth + 1),
+        )
+
+    def nearest(self, point, k=None, max_km=None, include=None):
+        target = to_unit_vector(point)
+        bound = inf if max_km is None else km_to_chord(max_km) ** 2
+        found = []
+        counter = 0
+
+        def current_bound():
+            if k is not None and len(found) == k:
+                return min(bound, -found[0][0])
+            return bound
+
+        def search(node):
+            nonlocal counter
+            if node is None:
+                return
+            vector, key, axis, left, right = node
+
+            dist2 = (
+                (vector[0] - target[0]) ** 2
+                + (vector[1] - target[1]) ** 2
+                + (vector[2] - target[2]) ** 2
+            )
+            if dist2 <= current_bound() and (include is None or key in include):
+                counter += 1
+                if k is not None and len(found) == k:
+                    heapq.heapreplace(found, (-dist2, counter, key))
+                else:
+                    heapq.heappush(found, (-dist2, counter, key))
+
+            diff = target[axis] - vector[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            search(near)
+            if diff * diff <= current_bound():
+                search(far)
+
+        if k != 0:
+            search(self.root)
+
+        return [
+            (key, round(chord_to_km((-neg_dist2) ** 0.5), 2))
+            for neg_dist2, _, key in sorted(found, reverse=True)
+        ]
+
+    def within(self, point, km, include=None):
+        return self.nearest(point, max_km=km, include=include)
@@ -1,3 +1,120 @@
-from django.test import TestCase
+import io
+import os
+import random
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from . import services
+from .distances import haversine_matrix
+from .models import Place
+from .signals import places_updated
+from .spatial import SpatialIndex
+
+
+@override_settings(GEOCODER_PROVIDER='geocoder.providers.FakeProvider')
+class CoordinatesCacheTest(TestCase):
+    def setUp(self):
+        services.coordinates_cache.clear()
+        services.get_geocoder.cache_clear()
+        self.addCleanup(services.get_geocoder.cache_clear)
+
+    def test_fetch_coordinates_uses_one_query(self):
+        addresses = [f'Москва, Синтетическая улица {number}' for number in range(100)]
+        services.get_or_create_coordinates_many(addresses)
+        services.coordinates_cache.clear()
+
+        with self.assertNumQueries(1):
+            coordinates = services.fetch_coordinates(addresses)
+        self.assertEqual(len(coordinates), 100)
+
+        with self.assertNumQueries(0):
+            services.fetch_coordinates(addresses)
+
+    def test_address_variants_share_one_place(self):
+        coordinates = services.get_or_create_coordinates_many([
+            'Москва, Тверская 1',
+            '  москва,Тверская   1 ',
+        ])
+
+        self.assertEqual(Place.objects.count(), 1)
+        self.assertEqual(len(set(coordinates.values())), 1)
+
+    def test_missed_address_is_not_geocoded_again(self):
+        geocoder = mock.Mock(return_value=None)
+        with mock.patch.object(services, 'get_geocoder', return_value=geocoder):
+            services.get_or_create_coordinates('Нигде, 1')
+            services.coordinates_cache.clear()
+            with self.assertNumQueries(1):
+                self.assertIsNone(services.get_or_create_coordinates('Нигде, 1'))
+
+        geocoder.assert_called_once_with('нигде, 1')
+
+
+@override_settings(GEOCODER_PROVIDER='geocoder.providers.FakeProvider')
+class PlacesDumpTest(TestCase):
+    def setUp(self):
+        services.coordinates_cache.clear()
+        services.get_geocoder.cache_clear()
+        self.addCleanup(services.get_geocoder.cache_clear)
+
+    def test_round_trip(self):
+        services.get_or_create_coordinates_many([
+            f'Москва, Синтетическая улица {number}' for number in range(10)
+        ])
+        fields = ('address', 'latitude', 'longitude', 'retry_after')
+        places = list(Place.objects.order_by('address').values_list(*fields))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'places.ndjson.gz')
+            call_command('dump_places', path, stderr=io.StringIO())
+            Place.objects.all().delete()
+
+            updated_addresses = []
+
+            def collect_addresses(sender, addresses, **kwargs):
+                updated_addresses.extend(addresses)
+
+            places_updated.connect(collect_addresses)
+            self.addCleanup(places_updated.disconnect, collect_addresses)
+            call_command('load_places', path, stdout=io.StringIO())
+
+        self.assertEqual(list(Place.objects.order_by('address').values_list(*fields)), places)
+        self.assertEqual(sorted(updated_addresses), [address for address, *_ in places])
+
+
+class SpatialIndexTest(TestCase):
+    def brute_force(self, point, points, k=None, max_km=None, include=None):
+        [distances] = haversine_matrix([point], list(points.values()))
+        found = sorted(
+            (dist_km, key)
+            for key, dist_km in zip(points, distances)
+            if (max_km is None or dist_km <= max_km) and (include is None or key in include)
+        )
+        return [key for _, key in found[:k]]
+
+    def test_matches_brute_force(self):
+        rng = random.Random(0)
+        for trial in range(100):
+            points = {
+                number: (55.5 + rng.random(), 37.2 + rng.random())
+                for number in range(rng.randrange(0, 60))
+            }
+            index = SpatialIndex(points.items())
+            point = (55.5 + rng.random(), 37.2 + rng.random())
+            params = {
+                'k': rng.choice([None, 0, 1, 3, 100]),
+                'max_km': rng.choice([None, 5, 20]),
+                'include': rng.choice([None, set(rng.sample(range(60), 20))]),
+            }
+            with self.subTest(trial=trial, **params):
+                found = index.nearest(point, **params)
+                self.assertEqual([key for key, _ in found], self.brute_force(point, points, **params))
+                self.assertEqual([dist_km for _, dist_km in found], sorted(dist_km for _, dist_km in found))
+
+    def test_within(self):
+        points = {'near': (55.75, 37.62), 'far': (59.94, 30.31)}
+        index = SpatialIndex(points.items())
+        self.assertEqual([key for key, _ in index.within((55.76, 37.6), 50)], ['near'])
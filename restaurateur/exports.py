@@ -0,0 +1,140 @@
+import csv
+from datetime import datetime, time, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from foodcartapp.models import Order, OrderItem
+from foodcartapp.streaming import iter_chunks, iter_ndjson
+
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+ORDER_COLUMNS = [
+    'id', 'status', 'payment_method', 'firstname', 'lastname', 'phonenumber',
+    'address', 'comment', 'restaurant_id', 'restaurant', 'total_price',
+    'created_at', 'called_at', 'delivered_at',
+]
+ITEM_COLUMNS = ['product_id', 'product', 'quantity', 'price']
+
+
+def parse_export_date(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: ['Ожидалась дата в формате ГГГГ-ММ-ДД.']})
+    return timezone.make_aware(datetime.combine(parsed, time.min))
+
+
+def get_export_orders(params):
+    orders = Order.objects.all()
+
+    since = parse_export_date(params, 'since')
+    if since:
+        orders = orders.filter(created_at__gte=since)
+
+    until = parse_export_date(params, 'until')
+    if until:
+        orders = orders.filter(created_at__lt=until + timedelta(days=1))
+
+    statuses = params.getlist('status')
+    unknown_statuses = set(statuses) - set(Order.Status.values)
+    if unknown_statuses:
+        raise ValidationError({
+            'status': [f'Неизвестные статусы: {", ".join(sorted(unknown_statuses))}.'],
+        })
+    if statuses:
+        orders = orders.filter(status__in=statuses)
+
+    items = OrderItem.objects.select_related('product').only(
+        'order_id', 'product_id', 'product__name', 'quantity', 'price',
+    )
+    return (
+        orders
+        .select_related('restaurant')
+        .prefetch_related(Prefetch('items', queryset=items))
+        .with_total_price()
+        .order_by('id')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def dump_order(order):
+    return {
+        'id': order.id,
+        'status': order.status,
+        'payment_method': order.payment_method,
+        'firstname': order.firstname,
+        'lastname': order.lastname,
+        'phonenumber': str(order.phonenumber),
+        'address': order.address,
+        'comment': order.comment,
+        'restaurant_id': order.restaurant_id,
+        'restaurant': order.restaurant.name if order.restaurant else None,
+        'total_price': order.total_price,
+        'created_at': order.created_at,
+        'called_at': order.called_at,
+        'delivered_at': order.delivered_at,
+    }
+
+
+def dump_order_item(item):
+    return {
+        'product_id': item.product_id,
+        'product': item.product.name,
+        'quantity': item.quantity,
+        'price': item.price,
+    }
+
+
+def iter_orders_ndjson(orders):
+    for order in orders:
+        dumped_order = dump_order(order)
+        dumped_order['items'] = [dump_order_item(item) for item in order.items.all()]
+        yield dumped_order
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def format_csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_orders_csv_rows(orders):
+    writer = csv.writer(Echo())
+    yield writer.writerow(ORDER_COLUMNS + ITEM_COLUMNS)
+
+    empty_item = [''] * len(ITEM_COLUMNS)
+    for order in orders:
+        dumped_order = dump_order(order)
+        order_row = [format_csv_value(dumped_order[column]) for column in ORDER_COLUMNS]
+        items = order.items.all()
+        if not items:
+            yield writer.writerow(order_row + empty_item)
+        for item in items:
+            dumped_item = dump_order_item(item)
+            yield writer.writerow(order_row + [dumped_item[column] for column in ITEM_COLUMNS])
+
+
+def iter_orders_export(orders, export_format):
+    if export_format == 'ndjson':
+        return iter_ndjson(iter_orders_ndjson(orders))
+    return iter_chunks(iter_orders_csv_rows(orders))
@@ -1,3 +1,114 @@
+import csv
+import io
+from datetime import datetime
+
 from django.test import TestCase
+from django.utils import timezone
+
+from foodcartapp.models import Order, OrderItem, Product
+from foodcartapp.synthetic import build_dataset
+from foodcartapp.testing import FakeGeocoderMixin, QueryBudgetMixin
+
+from .exports import ITEM_COLUMNS, ORDER_COLUMNS
+
+
+class ViewProductsTest(QueryBudgetMixin, TestCase):
+    def test_products_matrix(self):
+        self.login()
+        self.assertQueryBudget(lambda: self.client.get('/manager/products/'), max_queries=6)
+
+
+class ViewOrdersTest(QueryBudgetMixin, TestCase):
+    def test_active_orders(self):
+        self.login()
+        self.assertQueryBudget(lambda: self.client.get('/manager/orders/'), max_queries=6)
+
+    def test_status_tab(self):
+        self.login()
+        self.assertQueryBudget(
+            lambda: self.client.get('/manager/orders/', {'status': 'unprocessed'}),
+            max_queries=6,
+        )
+
+    def test_non_ascii_before_is_ignored(self):
+        self.login()
+        response = self.client.get('/manager/orders/', {'before': '²'})
+        self.assertEqual(response.status_code, 200)
+
+
+class ExportOrdersTest(QueryBudgetMixin, TestCase):
+    def test_csv(self):
+        self.login()
+        self.assertQueryBudget(lambda: self.client.get('/manager/orders/export/'), max_queries=4)
+
+    def test_ndjson(self):
+        self.login()
+        self.assertQueryBudget(
+            lambda: self.client.get('/manager/orders/export/', {'format': 'ndjson', 'status': 'unprocessed'}),
+            max_queries=4,
+        )
+
+
+class ExportOrdersOutputTest(FakeGeocoderMixin, TestCase):
+    def export(self, **params):
+        response = self.client.get('/manager/orders/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return list(csv.DictReader(io.StringIO(response.getvalue().decode())))
+
+    def test_csv_output(self):
+        self.login()
+        build_dataset(restaurants=1, products=3, orders=2)
+        items = list(OrderItem.objects.select_related('order', 'product').order_by('order_id', 'id'))
+        Product.objects.update(price=1)
+
+        response = self.client.get('/manager/orders/export/')
+        header = next(csv.reader(io.StringIO(response.getvalue().decode())))
+        self.assertEqual(header, ORDER_COLUMNS + ITEM_COLUMNS)
+
+        rows = self.export()
+        self.assertEqual(
+            [(row['id'], row['product_id'], row['quantity'], row['price']) for row in rows],
+            [(str(item.order_id), str(item.product_id), str(item.quantity), str(item.price)) for item in items],
+        )
+        self.assertNotIn('1.00', {row['price'] for row in rows})
+
+    def test_date_filters(self):
+        self.login()
+        build_dataset(restaurants=1, products=2, orders=2)
+        january_order, february_order = Order.objects.order_by('id')
+        for order, month in [(january_order, 1), (february_order, 2)]:
+            Order.objects.filter(pk=order.pk).update(
+                created_at=timezone.make_aware(datetime(2024, month, 10, 23, 30)),
+            )
+
+        self.assertEqual({row['id'] for row in self.export(since='2024-02-01')}, {str(february_order.id)})
+        self.assertEqual({row['id'] for row in self.export(until='2024-01-10')}, {str(january_order.id)})
+        self.assertEqual(self.export(since='2024-01-11', until='2024-02-09'), [])
+
+    def test_status_filter(self):
+        self.login()
+        build_dataset(restaurants=1, products=2, orders=3)
+        delivered_order = Order.objects.first()
+        Order.objects.filter(pk=delivered_order.pk).update(status=Order.Status.DELIVERED)
+
+        exported_ids = {row['id'] for row in self.export(status=['unprocessed', 'in_progress'])}
+        self.assertNotIn(str(delivered_order.id), exported_ids)
+        self.assertEqual(len(exported_ids), 2)
+
+    def test_active_tab_exports_active_statuses(self):
+        self.login()
+        response = self.client.get('/manager/orders/')
+        self.assertContains(response, '/manager/orders/export/?status=unprocessed&amp;status=in_progress"')
 
-# Create your tests here.
+    def test_invalid_params(self):
+        self.login()
+        for params, field in [
+            ({'status': 'lost'}, 'status'),
+            ({'since': '2024-13-01'}, 'since'),
+            ({'until': 'вчера'}, 'until'),
+            ({'format': 'xml'}, 'format'),
+        ]:
+            with self.subTest(params=params):
+                response = self.client.get('/manager/orders/export/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(field, response.json())
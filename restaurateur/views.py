@@ -5,10 +5,17 @@ from django.urls import reverse_lazy
 from django.contrib.auth import authenticate, login
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.decorators import user_passes_test
-from geocoder.models import Place
-from geopy.distance import distance
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Prefetch
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.http import urlencode
+from geocoder.services import fetch_coordinates, get_pending_addresses
 
-from foodcartapp.models import Product, Restaurant, Order
+from foodcartapp.availability import get_availability_index, get_availability_matrix
+from foodcartapp.models import Product, Restaurant, Order, OrderCandidate
+
+from .exports import EXPORT_FORMATS, get_export_orders, iter_orders_export
 
 
 class Login(forms.Form):
@@ -59,23 +66,25 @@ class LogoutView(auth_views.LogoutView):
     next_page = reverse_lazy('restaurateur:login')
 
 
+ACTIVE_ORDERS_TAB = 'active'
+ORDER_TABS = [(ACTIVE_ORDERS_TAB, 'Активные')] + Order.Status.choices
+
+
 def is_manager(user):
     return user.is_staff  # FIXME replace with specific permission
 
 
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_products(request):
-    restaurants = list(Restaurant.objects.order_by('name'))
-    products = list(Product.objects.prefetch_related('menu_items'))
+    matrix = get_availability_matrix()
+    index = get_availability_index()
+    restaurants = [index.get_restaurant(restaurant_id) for restaurant_id in matrix.restaurant_ids]
+    products = Product.objects.select_related('category')
 
-    products_with_restaurant_availability = []
-    for product in products:
-        availability = {item.restaurant_id: item.availability for item in product.menu_items.all()}
-        ordered_availability = [availability.get(restaurant.id, False) for restaurant in restaurants]
-
-        products_with_restaurant_availability.append(
-            (product, ordered_availability)
-        )
+    products_with_restaurant_availability = [
+        (product, matrix.row(product.id))
+        for product in products
+    ]
 
     return render(request, template_name="products_list.html", context={
         'products_with_restaurant_availability': products_with_restaurant_availability,
@@ -92,30 +101,38 @@ def view_restaurants(request):
 
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_orders(request):
-    orders = (
-        Order.objects
-        .exclude(status=Order.Status.DELIVERED)
-        .select_related('restaurant')
-        .prefetch_related('items__product')
+    tab = request.GET.get('status', ACTIVE_ORDERS_TAB)
+    if tab not in dict(ORDER_TABS):
+        tab = ACTIVE_ORDERS_TAB
+
+    if tab == ACTIVE_ORDERS_TAB:
+        statuses = [status for status in Order.Status.values if status != Order.Status.DELIVERED]
+    else:
+        statuses = [tab]
+    orders = Order.objects.select_related('restaurant').filter(status__in=statuses)
+
+    before = request.GET.get('before', '')
+    paginated = before.isascii() and before.isdigit()
+    if paginated:
+        orders = orders.filter(id__lt=int(before))
+
+    candidates = OrderCandidate.objects.select_related('restaurant').order_by('distance_km')
+    if settings.DELIVERY_RADIUS_KM is not None:
+        candidates = candidates.filter(distance_km__lte=settings.DELIVERY_RADIUS_KM)
+
+    page_size = settings.ORDERS_PAGE_SIZE
+    orders = list(
+        orders
+        .prefetch_related(Prefetch('candidates', queryset=candidates))
         .with_total_price()
-        .order_by('-id')
-        .with_available_restaurants()
+        .order_by('-id')[:page_size + 1]
     )
+    next_before = orders[page_size - 1].id if len(orders) > page_size else None
+    orders = orders[:page_size]
 
     order_addresses = {o.address for o in orders if o.address}
-
-    restaurant_addresses = set()
-    for o in orders:
-        for r in getattr(o, 'available_restaurants', []):
-            if r.address:
-                restaurant_addresses.add(r.address)
-
-    all_addresses = order_addresses | restaurant_addresses
-
-    places_by_address = {
-        p.address: p
-        for p in Place.objects.filter(address__in=all_addresses)
-    }
+    coordinates = fetch_coordinates(order_addresses)
+    pending_addresses = get_pending_addresses(order_addresses)
 
     order_items = []
 
@@ -127,43 +144,65 @@ def view_orders(request):
                 'order': order,
                 'restaurants': [{'restaurant': order.restaurant, 'distance_km': None}],
                 'address_not_found': False,
+                'geocoding_pending': False,
                 'total_cost': total_cost,
             })
             continue
 
-        order_place = places_by_address.get(order.address)
-        if not order_place or order_place.latitude is None or order_place.longitude is None:
+        if order.address not in coordinates:
             order_items.append({
                 'order': order,
                 'restaurants': [],
-                'address_not_found': True,
+                'address_not_found': order.address not in pending_addresses,
+                'geocoding_pending': order.address in pending_addresses,
                 'total_cost': total_cost,
             })
             continue
 
-        order_coords = (order_place.latitude, order_place.longitude)
-
-        restaurants_with_distance = []
-        for restaurant in getattr(order, 'available_restaurants', []):
-            restaurant_place = places_by_address.get(restaurant.address)
-            if not restaurant_place or restaurant_place.latitude is None or restaurant_place.longitude is None:
-                continue
-
-            rest_coords = (restaurant_place.latitude, restaurant_place.longitude)
-            dist_km = round(distance(order_coords, rest_coords).km, 2)
-
-            restaurants_with_distance.append({
-                'restaurant': restaurant,
-                'distance_km': dist_km,
-            })
-
-        restaurants_with_distance.sort(key=lambda x: x['distance_km'])
+        restaurants_with_distance = [
+            {
+                'restaurant': candidate.restaurant,
+                'distance_km': candidate.distance_km,
+            }
+            for candidate in order.candidates.all()
+        ]
 
         order_items.append({
             'order': order,
             'restaurants': restaurants_with_distance,
             'address_not_found': False,
+            'geocoding_pending': False,
             'total_cost': total_cost,
         })
 
-    return render(request, 'order_items.html', {'order_items': order_items})
\ No newline at end of file
+    return render(request, 'order_items.html', {
+        'order_items': order_items,
+        'tabs': ORDER_TABS,
+        'current_tab': tab,
+        'next_before': next_before,
+        'is_first_page': not paginated,
+        'export_query': urlencode({'status': statuses}, doseq=True),
+    })
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def export_orders(request):
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        error = {'format': [f'Ожидалось одно из: {", ".join(EXPORT_FORMATS)}.']}
+        return JsonResponse(error, status=400, json_dumps_params={
+            'ensure_ascii': False,
+        })
+
+    try:
+        orders = get_export_orders(request.GET)
+    except ValidationError as error:
+        return JsonResponse(error.message_dict, status=400, json_dumps_params={
+            'ensure_ascii': False,
+        })
+
+    response = StreamingHttpResponse(
+        iter_orders_export(orders, export_format),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="orders.{export_format}"'
+    return response
@@ -0,0 +1,197 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from geocoder.signals import geocoding_finished
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+COUNTERS = (
+    ('http_requests_total', 'counter', 'Число обработанных запросов'),
+    ('http_response_bytes_total', 'counter', 'Объём ответов в байтах'),
+    ('db_queries_total', 'counter', 'Число SQL-запросов'),
+    ('db_query_duration_seconds_total', 'counter', 'Время выполнения SQL-запросов'),
+    ('geocoder_calls_total', 'counter', 'Число обращений к геокодеру'),
+    ('geocoder_duration_seconds_total', 'counter', 'Время ожидания геокодера'),
+)
+
+current_request_stats = ContextVar('current_request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.duration = 0.0
+        self.queries = 0
+        self.query_duration = 0.0
+        self.geocoder_calls = 0
+        self.geocoder_duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_duration += time.perf_counter() - started_at
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self.durations = defaultdict(float)
+        self.requests = defaultdict(int)
+
+    def observe(self, view, method, status, duration, response_size, stats):
+        labels = (('view', view), ('method', method), ('status', str(status)))
+        view_labels = (('view', view),)
+        with self.lock:
+            self.counters['http_requests_total', labels] += 1
+            self.counters['http_response_bytes_total', view_labels] += response_size
+            self.counters['db_queries_total', view_labels] += stats.queries
+            self.counters['db_query_duration_seconds_total', view_labels] += stats.query_duration
+            self.counters['geocoder_calls_total', view_labels] += stats.geocoder_calls
+            self.counters['geocoder_duration_seconds_total', view_labels] += stats.geocoder_duration
+
+            buckets = self.buckets[view_labels]
+            for number, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[number] += 1
+            self.durations[view_labels] += duration
+            self.requests[view_labels] += 1
+
+    def render(self, prefix='starburger_'):
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = [
+                (labels, list(buckets), self.durations[labels], self.requests[labels])
+                for labels, buckets in self.buckets.items()
+            ]
+
+        lines = []
+        for name, metric_type, help_text in COUNTERS:
+            lines.append(f'# HELP {prefix}{name} {help_text}')
+            lines.append(f'# TYPE {prefix}{name} {metric_type}')
+            for (metric_name, labels), value in sorted(counters.items()):
+                if metric_name == name:
+                    lines.append(f'{prefix}{name}{format_labels(labels)} {value:g}')
+
+        name = f'{prefix}http_request_duration_seconds'
+        lines.append(f'# HELP {name} Время обработки запроса')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, buckets, duration, requests in sorted(histograms):
+            for bound, count in zip(DURATION_BUCKETS, buckets):
+                lines.append(f'{name}_bucket{format_labels(labels + (("le", f"{bound:g}"),))} {count}')
+            lines.append(f'{name}_bucket{format_labels(labels + (("le", "+Inf"),))} {requests}')
+            lines.append(f'{name}_sum{format_labels(labels)} {duration:g}')
+            lines.append(f'{name}_count{format_labels(labels)} {requests}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    escaped = (
+        (key, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+registry = MetricsRegistry()
+
+
+@receiver(geocoding_finished)
+def count_geocoder_calls(sender, calls, duration, **kwargs):
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.geocoder_calls += calls
+        stats.geocoder_duration += duration
+
+
+class PerformanceMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        with self.measure(stats):
+            response = self.get_response(request)
+
+        if response.streaming:
+            response.streaming_content = self.stream(
+                request,
+                response,
+                stats,
+                response.streaming_content,
+            )
+        else:
+            self.observe(request, response, stats, len(response.content))
+
+        scope = ' before streaming' if response.streaming else ''
+        response['Server-Timing'] = ', '.join([
+            f'app;dur={stats.duration * 1000:.1f};desc="view{scope}"',
+            f'db;dur={stats.query_duration * 1000:.1f};desc="{stats.queries} queries{scope}"',
+            f'geocoder;dur={stats.geocoder_duration * 1000:.1f};desc="{stats.geocoder_calls} calls{scope}"',
+        ])
+        return response
+
+    @contextmanager
+    def measure(self, stats):
+        token = current_request_stats.set(stats)
+        started_at = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                yield
+        finally:
+            stats.duration += time.perf_counter() - started_at
+            current_request_stats.reset(token)
+
+    def stream(self, request, response, stats, content):
+        chunks = iter(content)
+        response_size = 0
+        while True:
+            with self.measure(stats):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            response_size += len(chunk)
+            yield chunk
+        self.observe(request, response, stats, response_size)
+
+    def observe(self, request, response, stats, response_size):
+        match = request.resolver_match
+        registry.observe(
+            view=match.view_name if match else 'unresolved',
+            method=request.method,
+            status=response.status_code,
+            duration=stats.duration,
+            response_size=response_size,
+            stats=stats,
+        )
+
+
+def metrics_view(request):
+    authorization = request.headers.get('Authorization', '')
+    token_matches = settings.METRICS_TOKEN and constant_time_compare(
+        authorization,
+        f'Bearer {settings.METRICS_TOKEN}',
+    )
+    if not token_matches and not request.user.is_staff:
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 import dj_database_url
 
@@ -34,6 +35,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'star_burger.metrics.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -127,3 +129,29 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "assets"),
     os.path.join(BASE_DIR, "bundles"),
 ]
+
+CACHES = {
+    'default': {
+        'BACKEND': env('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': env('CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'star-burger-cache')),
+    }
+}
+
+GEOCODER_PROVIDER = env('GEOCODER_PROVIDER', 'geocoder.providers.NominatimProvider')
+GEOCODER_WORKERS = env.int('GEOCODER_WORKERS', 4)
+GEOCODER_TTL = env.int('GEOCODER_TTL', 30 * 24 * 60 * 60)
+GEOCODER_RETRY_DELAY = env.int('GEOCODER_RETRY_DELAY', 24 * 60 * 60)
+GEOCODER_LRU_SIZE = env.int('GEOCODER_LRU_SIZE', 10000)
+GEOCODER_LRU_TIMEOUT = env.int('GEOCODER_LRU_TIMEOUT', 5 * 60)
+
+CATALOG_PAGE_SIZE = 20
+CATALOG_MAX_PAGE_SIZE = 100
+
+EXACT_DISTANCES = env.bool('EXACT_DISTANCES', False)
+DELIVERY_RADIUS_KM = env.float('DELIVERY_RADIUS_KM', None)
+
+METRICS_TOKEN = env('METRICS_TOKEN', '')
+
+ORDERS_PAGE_SIZE = 50
+
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)